@@ -1,4 +1,4 @@
-from queue import PriorityQueue
+from heapq import heappush, heappop
 from functools import partial
 
 from enumtypes import ErrorType, FeeType
@@ -59,11 +59,21 @@ class ChannelInDirection:
 		# Note: amount here refers either to payment _body_ (for success-case fee) or _amount_ (for unconditional / upfront fees).
 		return base + rate * amount
 
+	@staticmethod
+	def get_fee_coefficients(fee_function):
+		# Return the base fee and the fee rate of a fee function created in set_fee.
+		# For any other function, return None (its inverse can't be calculated directly).
+		if isinstance(fee_function, partial) and fee_function.func is ChannelInDirection.generic_fee_function:
+			base_fee, fee_rate = fee_function.args
+			return base_fee, fee_rate
+		return None
+
 	def set_fee(self, fee_type, base_fee, fee_rate):
 		# Set a fee to a channel direction.
 		# Note: we store both the fee coefficients and the fee function.
 		# The fee function is the generic fee function partially applied (coefficients are given, the amount is not).
-		fee_function = partial(lambda a: ChannelInDirection.generic_fee_function(base_fee, fee_rate, a))
+		# Note: the coefficients can be recovered from the fee function (see get_fee_coefficients).
+		fee_function = partial(ChannelInDirection.generic_fee_function, base_fee, fee_rate)
 		if fee_type == FeeType.UPFRONT:
 			self.upfront_base_fee = base_fee
 			self.upfront_fee_rate = fee_rate
@@ -74,21 +84,21 @@ class ChannelInDirection:
 			self.success_fee_function = fee_function
 
 	def reset_slots(self, num_slots=None):
-		# Initialize an HTLC priority queue of a given maximum size.
-		# Note: an existing queue cannot be re-sized.
-		# We store num_slots in a separate variable: we can't get it from a queue after it's created.
+		# Initialize an HTLC priority queue (a heap) of a given maximum size.
+		# We use heapq on a plain list rather than queue.PriorityQueue: the simulation is single-threaded,
+		# so we don't need PriorityQueue's locking. The heap doesn't bound its size, so we keep num_slots separately.
 		if num_slots is not None:
 			assert num_slots > 0
 			self.num_slots = num_slots
 		else:
 			assert self.num_slots is not None
-		self.slots = PriorityQueue(maxsize=self.num_slots)
+		self.slots = []
 
 	def all_slots_busy(self):
-		return self.slots.full()
+		return len(self.slots) >= self.num_slots
 
 	def all_slots_free(self):
-		return self.slots.empty()
+		return not self.slots
 
 	def is_jammed(self, time):
 		# A channel direction is jammed at a given time if:
@@ -102,7 +112,7 @@ class ChannelInDirection:
 	def get_num_slots_occupied(self):
 		# Get the number of HTLCs currently in the queue.
 		# Note: some HTLCs may be outdated!
-		return self.slots.qsize()
+		return len(self.slots)
 
 	def get_num_slots_free(self):
 		# Get the number of slots that are free.
@@ -112,7 +122,7 @@ class ChannelInDirection:
 	def get_earliest_htlc_resolution_time(self):
 		# Get the resolution time of the earliest HTLC in the queue without popping it.
 		assert not self.all_slots_free()
-		return self.slots.queue[0][0]
+		return self.slots[0][0]
 
 	def requires_fee_for_body(self, fee_type, body, zero_success_fee=False):
 		# Calculate the fee of fee_type needed for the given payment body.
@@ -141,7 +151,7 @@ class ChannelInDirection:
 	def pop_htlc(self):
 		# Pop the earliest HTLC from the queue along with its resolution timestamp.
 		assert not self.all_slots_free()
-		resolution_time, htlc = self.slots.get_nowait()
+		resolution_time, htlc = heappop(self.slots)
 		return resolution_time, htlc
 
 	def push_htlc(self, resolution_time, in_flight_htlc):
@@ -149,7 +159,7 @@ class ChannelInDirection:
 		# Note: the queue must not be full: we must have ensured this earlier.
 		# See ensure_free_slots.
 		assert not self.all_slots_busy()
-		self.slots.put_nowait((resolution_time, in_flight_htlc))
+		heappush(self.slots, (resolution_time, in_flight_htlc))
 
 	def ensure_free_slots(self, time, num_slots_needed=1):
 		# Ensure there are num_slots_needed free slots in the HTLC queue.
@@ -9,6 +9,9 @@ def test_set_get_fee():
 	cd.set_fee(FeeType.SUCCESS, base_fee=2, fee_rate=0.02)
 	assert cd.upfront_fee_function(100) == 2
 	assert cd.success_fee_function(100) == 4
+	assert ChannelInDirection.get_fee_coefficients(cd.upfront_fee_function) == (1, 0.01)
+	assert ChannelInDirection.get_fee_coefficients(cd.success_fee_function) == (2, 0.02)
+	assert ChannelInDirection.get_fee_coefficients(lambda a: 1 + 0.01 * a) is None
 
 
 def test_channel_direction():
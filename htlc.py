@@ -9,6 +9,10 @@ class Htlc:
 		An HTLC only contains success-case fee, and doesn't include the payment amount.
 	'''
 
+	# HTLCs are created on every hop of every payment attempt and kept in channel queues:
+	# don't give each of them a __dict__.
+	__slots__ = ("payment_id", "success_fee", "desired_result")
+
 	def __init__(self, payment_id, success_fee, desired_result):
 		'''
 			- payment_id
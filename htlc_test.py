@@ -6,6 +6,7 @@ def test_htlc_creation():
 	assert(htlc.payment_id == "pid1")
 	assert(htlc.success_fee == 100)
 	assert(htlc.desired_result is True)
+	assert(not hasattr(htlc, "__dict__"))
 
 
 def test_htlc_compare():
@@ -1,6 +1,8 @@
 import networkx as nx
+import numpy as np
 from random import random
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from bisect import bisect_left
 
 from direction import Direction
 from enumtypes import ErrorType, FeeType
@@ -12,6 +14,8 @@ from utils import generate_id
 
 import logging
 logger = logging.getLogger(__name__)
+# Set to True to also log (very verbose) per-HTLC diagnostics.
+TRACE = False
 
 
 class LNModel:
@@ -24,7 +28,8 @@ class LNModel:
 		snapshot_json,
 		default_num_slots_per_channel_in_direction,
 		no_balance_failures,
-		capacity_filtering_safety_margin=0.05):
+		capacity_filtering_safety_margin=0.05,
+		max_num_cached_route_searches=1000):
 		'''
 			- snapshot_json
 				A JSON object describing the LN graph (CLN's listchannels).
@@ -38,7 +43,12 @@ class LNModel:
 
 			- capacity_filtering_safety_margin
 				An extra allowed capacity allowed when filtering graph for sending a given amount.
+
+			- max_num_cached_route_searches
+				The maximum number of (sender, receiver, capacity class) keys to cache shortest routes for.
+				The least recently used key is evicted first.
 		'''
+		self.max_num_cached_route_searches = max_num_cached_route_searches
 		logger.debug(f"Initializing LNModel with {default_num_slots_per_channel_in_direction} slots per channel direction")
 		self.default_num_slots_per_channel_in_direction = default_num_slots_per_channel_in_direction
 		self.get_graphs_from_json(snapshot_json)
@@ -55,6 +65,25 @@ class LNModel:
 		# All other data (fees, HTLCs, etc) is stored in the hop graph.
 		self.hop_graph = nx.Graph()
 		self.routing_graph = nx.MultiDiGraph()
+		# A flat list of all enabled channel directions along with their upstream and downstream nodes.
+		# This lets us iterate through HTLC queues without traversing the hop graph.
+		self.channels_in_directions = []
+		# The position of each channel direction in the flat list above.
+		self.channel_in_direction_index = {}
+		# Positions (in the flat list above) of channel directions where HTLCs have been stored since the last reset.
+		# This lets us finalize in-flight HTLCs without touching every channel direction.
+		self.channels_in_directions_with_htlcs = set()
+		# An index from a node pair to the channels enabled in that direction, along with their channel directions.
+		# This lets us pick a channel on the forwarding path without querying the hop graph.
+		self.channels_in_hop_direction = {}
+		# Revenues of each fee type by node.
+		# We keep them in plain dicts rather than in node attributes of the hop graph, as they are updated on every hop.
+		self.revenues = {fee_type: {} for fee_type in FeeType}
+		# Shortest routes found so far, keyed by sender, receiver, and the set of edges left after capacity filtering.
+		# Must be invalidated whenever the routing graph (or any capacity in it) changes.
+		# A not yet exhausted route search keeps its BFS state over the whole routing graph in memory,
+		# hence the cache is bounded (least recently used keys are evicted first).
+		self.invalidate_shortest_routes_cache()
 		logger.info(f"Creating LN model...")
 		for cd in snapshot_json["channels"]:
 			src, dst, capacity, cid = cd["source"], cd["destination"], cd["satoshis"], cd["short_channel_id"]
@@ -79,6 +108,7 @@ class LNModel:
 		target_channel.set_capacity(capacity)
 		# we must set the new capacity to routing graph as well
 		self.routing_graph[src][dst][target_cid]["capacity"] = capacity
+		self.invalidate_shortest_routes_cache()
 
 	def add_edge(self, src, dst, capacity, cid=None, upfront_base_fee=0, upfront_fee_rate=0, success_base_fee=0, success_fee_rate=0, num_slots=None):
 		# Add a new edge to both the hop graph and the routing graph.
@@ -106,6 +136,12 @@ class LNModel:
 			ch = hop.get_channel(cid)
 		direction = Direction(src, dst)
 		ch.enable_direction_with_num_slots(direction, num_slots)
+		self.channel_in_direction_index.setdefault(ch.in_direction(direction), len(self.channels_in_directions))
+		self.channels_in_directions.append((src, dst, ch.in_direction(direction)))
+		# keep the channels in the same order as the hop does
+		self.channels_in_hop_direction[(src, dst)] = [
+			(ch, ch.in_direction(direction))
+			for ch in hop.get_all_channels() if ch.is_enabled_in_direction(direction)]
 		ch.set_fee_in_direction(direction, FeeType.UPFRONT, upfront_base_fee, upfront_fee_rate)
 		ch.set_fee_in_direction(direction, FeeType.SUCCESS, success_base_fee, success_fee_rate)
 
@@ -115,6 +151,7 @@ class LNModel:
 		# We look for routes in the (filtered) routing graph,
 		# and then pull hop info from the hop graph based on the chosen cid.
 		self.routing_graph.add_edge(src, dst, cid, capacity=capacity)
+		self.invalidate_shortest_routes_cache()
 
 	def add_jammers_channels(self, send_to_nodes=[], receive_from_nodes=[], num_slots=ProtocolParams["NUM_SLOTS"], capacity=1000000):
 		# Add edges representing the jammer's channels.
@@ -140,7 +177,7 @@ class LNModel:
 	def add_revenue(self, node, fee_type, amount):
 		# Add amount to a node's accumulated revenue of a given fee type (success-case or upfront).
 		assert node in self.hop_graph
-		self.hop_graph.nodes[node][fee_type.value] += amount
+		self.revenues[fee_type][node] += amount
 
 	def subtract_revenue(self, node, fee_type, amount):
 		# Subtract amount from the node's accumulated revenue of a given type.
@@ -148,14 +185,26 @@ class LNModel:
 
 	def shift_revenue(self, from_node, to_node, fee_type, amount):
 		# Shift amount from one node to another (from_node pays amount to to_node).
-		logger.debug(f"{from_node} pays {to_node} {amount} in {fee_type.value} fee")
-		self.subtract_revenue(from_node, fee_type, amount)
-		self.add_revenue(to_node, fee_type, amount)
+		# This is called on every hop, so we update the revenue dict directly instead of via add_revenue.
+		# Revenues are initialized for all nodes in the hop graph, so unknown nodes still raise (KeyError).
+		logger.debug("%s pays %s %s in %s fee", from_node, to_node, amount, fee_type.value)
+		revenues = self.revenues[fee_type]
+		revenues[from_node] -= amount
+		revenues[to_node] += amount
 
 	def get_revenue(self, node, fee_type):
 		# Return the node's revenue of a given fee type.
 		assert node in self.hop_graph
-		return self.hop_graph.nodes[node][fee_type.value]
+		return self.revenues[fee_type][node]
+
+	def get_revenues(self, nodes, fee_type):
+		# Return an array of the nodes' revenues of a given fee type (in the order of nodes).
+		revenues = self.revenues[fee_type]
+		return np.fromiter((revenues[node] for node in nodes), dtype=np.float64, count=len(nodes))
+
+	def get_total_revenues(self, nodes):
+		# Return an array of the nodes' total revenues, upfront plus success-case (in the order of nodes).
+		return self.get_revenues(nodes, FeeType.UPFRONT) + self.get_revenues(nodes, FeeType.SUCCESS)
 
 	def get_routing_graph_for_amount(self, amount):
 		# Return a routing graph view that only includes edges with capacity >= amount + safety margin
@@ -163,14 +212,53 @@ class LNModel:
 
 		def filter_edges(n1, n2, cid):
 			return self.routing_graph[n1][n2][cid]["capacity"] >= amount_with_safety_margin
-		logger.debug(f"Filtering out edges with capacity < {amount_with_safety_margin}")
+		logger.debug("Filtering out edges with capacity < %s", amount_with_safety_margin)
 		return nx.subgraph_view(self.routing_graph, lambda _: True, filter_edges)
 
+	def invalidate_shortest_routes_cache(self):
+		self.shortest_routes_cache = OrderedDict()
+		self.sorted_capacities = None
+
+	def get_capacity_class(self, amount):
+		# Return the number of distinct capacities in the routing graph that are too low for amount.
+		# Amounts with the same capacity class filter the routing graph down to the same set of edges.
+		if self.sorted_capacities is None:
+			self.sorted_capacities = sorted(set(capacity for _, _, capacity in self.routing_graph.edges(data="capacity")))
+		amount_with_safety_margin = (1 + self.capacity_filtering_safety_margin) * amount
+		return bisect_left(self.sorted_capacities, amount_with_safety_margin)
+
 	def get_shortest_routes(self, sender, receiver, amount):
 		# A generator of shortest routes from sender to receiver for amount.
 		# Yields one route at a time when called.
+		# Routes are generated lazily and cached, so that subsequent payments
+		# between the same nodes over the same filtered graph don't search for them again.
+		key = (sender, receiver, self.get_capacity_class(amount))
+		if key in self.shortest_routes_cache:
+			self.shortest_routes_cache.move_to_end(key)
+		else:
+			self.shortest_routes_cache[key] = [[], self.generate_shortest_routes(sender, receiver, amount)]
+			if len(self.shortest_routes_cache) > self.max_num_cached_route_searches:
+				self.shortest_routes_cache.popitem(last=False)
+		# an entry holds the routes found so far and the route search (None once exhausted)
+		entry = self.shortest_routes_cache[key]
+		cached_routes = entry[0]
+		i = 0
+		while True:
+			if i == len(cached_routes):
+				route = None if entry[1] is None else next(entry[1], None)
+				if route is None:
+					# all routes are cached: drop the search along with its BFS state
+					entry[1] = None
+					return
+				cached_routes.append(route)
+			# yield a copy so that the caller can't modify the cached route
+			yield list(cached_routes[i])
+			i += 1
+
+	def generate_shortest_routes(self, sender, receiver, amount):
+		# A generator of shortest routes from sender to receiver for amount (without caching).
 		route = None
-		logger.debug(f"Finding route from {sender} to {receiver} for {amount}")
+		logger.debug("Finding route from %s to %s for %s", sender, receiver, amount)
 		routing_graph = self.get_routing_graph_for_amount(amount)
 		if sender not in routing_graph or receiver not in routing_graph:
 			logger.warning(f"Can't find route from {sender} to {receiver}!")
@@ -178,7 +266,7 @@ class LNModel:
 			logger.warning(f"Sender {receiver} in graph? {receiver in routing_graph}")
 			yield from ()
 		elif not nx.has_path(routing_graph, sender, receiver):
-			logger.debug(f"No path from {sender} to {receiver} for {amount}")
+			logger.debug("No path from %s to %s for %s", sender, receiver, amount)
 			yield from ()
 		else:
 			routes = nx.all_shortest_paths(routing_graph, sender, receiver)
@@ -193,20 +281,39 @@ class LNModel:
 		assert self.hop_graph.has_edge(u_node, d_node)
 		return self.hop_graph.get_edge_data(u_node, d_node)["hop"]
 
+	def get_channels_in_direction(self, u_node, d_node):
+		# Return (channel, channel direction) pairs for all channels from u_node to d_node enabled in that direction.
+		# Channels are in the order the hop prefers them (see Hop.get_channels_with_condition).
+		return self.channels_in_hop_direction.get((u_node, d_node), [])
+
+	def get_cheapest_channel_maybe_can_forward(self, u_node, d_node, amount):
+		# Return the cid and the channel direction of the cheapest channel from u_node to d_node that can forward amount.
+		# Note: jamming status is not checked! See Hop.get_cheapest_channel_maybe_can_forward.
+		for ch, ch_in_dir in self.get_channels_in_direction(u_node, d_node):
+			if amount <= ch.get_capacity():
+				return ch.get_cid(), ch_in_dir
+		return None, None
+
+	def can_forward(self, u_node, d_node, time):
+		# Return True if some channel from u_node to d_node isn't jammed at a given time.
+		# Equivalent to Hop.can_forward in direction (u_node, d_node), but doesn't query the hop graph.
+		return any(not ch_in_dir.is_jammed(time) for _, ch_in_dir in self.get_channels_in_direction(u_node, d_node))
+
 	def reset_all_slots(self, num_slots=None):
 		# Reset HTLC queues in all channels (erases in-flight HTLCs; done between simulations).
 		logger.debug("Resetting slots in all channels")
 		for node_1, node_2 in self.hop_graph.edges():
 			for ch in self.get_hop(node_1, node_2).get_all_channels():
 				for direction in (Direction.Alph, Direction.NonAlph):
-					logger.debug(f"Resetting channel {ch.get_cid()} ({node_1} - {node_2}) in {direction} with num slots = {num_slots}")
+					logger.debug("Resetting channel %s (%s - %s) in %s with num slots = %s", ch.get_cid(), node_1, node_2, direction, num_slots)
 					ch.reset_slots_in_direction(direction, num_slots)
+		self.channels_in_directions_with_htlcs.clear()
 
 	def reset_revenue(self, node):
 		# Set the node's revenue to zero (done between simulations).
 		assert node in self.hop_graph
-		self.hop_graph.nodes[node][FeeType.UPFRONT.value] = 0
-		self.hop_graph.nodes[node][FeeType.SUCCESS.value] = 0
+		for fee_type in FeeType:
+			self.revenues[fee_type][node] = 0
 
 	def reset_all_revenues(self):
 		logger.debug("Resetting all revenues")
@@ -215,7 +322,7 @@ class LNModel:
 
 	def set_fee_for_all(self, fee_type, base, rate):
 		# Set the fee parameters of a given type to given values for all channels.
-		logger.debug(f"Setting {fee_type.value} fee for all to: base {base}, rate {rate}")
+		logger.debug("Setting %s fee for all to: base %s, rate %s", fee_type.value, base, rate)
 		for node_1, node_2 in self.hop_graph.edges():
 			for ch in self.get_hop(node_1, node_2).get_all_channels():
 				for direction in (Direction.Alph, Direction.NonAlph):
@@ -224,7 +331,7 @@ class LNModel:
 
 	def set_upfront_fee_from_coeff_for_all(self, upfront_base_coeff, upfront_rate_coeff):
 		# Set upfront fee parameters from existing success-case fees by scaling them with given coefficients.
-		logger.debug(f"Setting upfront fee for all as share of success fee with: base coeff {upfront_base_coeff}, rate coeff {upfront_rate_coeff}")
+		logger.debug("Setting upfront fee for all as share of success fee with: base coeff %s, rate coeff %s", upfront_base_coeff, upfront_rate_coeff)
 		for node_1, node_2 in self.hop_graph.edges():
 			for ch in self.get_hop(node_1, node_2).get_all_channels():
 				for direction in (Direction.Alph, Direction.NonAlph):
@@ -237,29 +344,28 @@ class LNModel:
 
 	def finalize_in_flight_htlcs(self, cutoff_time):
 		# Resolve all outdated HTLCs (done after the simulation is complete).
-		for node_1, node_2 in self.hop_graph.edges():
-			# Note: the order of (node_1, node_2) doesn't matter!
-			for ch in self.get_hop(node_1, node_2).get_all_channels():
-				for from_node, to_node in ((node_1, node_2), (node_2, node_1)):
-					#logger.debug(f"Resolving HTLCs from {from_node} and {to_node}")
-					direction = Direction(from_node, to_node)
-					if ch.is_enabled_in_direction(direction):
-						ch_in_dir = ch.in_direction(direction)
-						while not ch_in_dir.all_slots_free():
-							if ch_in_dir.get_earliest_htlc_resolution_time() > cutoff_time:
-								break
-							resolution_time, htlc = ch_in_dir.pop_htlc()
-							#logger.debug(f"Released HTLC {htlc} with resolution time {next_htlc_time}")
-							if htlc.desired_result is True:
-								self.shift_revenue(from_node, to_node, FeeType.SUCCESS, htlc.success_fee)
-						#logger.debug(f"No more HTLCs to resolve up to time ({cutoff_time})")
+		# Only channel directions that have stored HTLCs since the last reset are checked (in the order of the flat list).
+		for i in sorted(self.channels_in_directions_with_htlcs):
+			from_node, to_node, ch_in_dir = self.channels_in_directions[i]
+			while not ch_in_dir.all_slots_free():
+				if ch_in_dir.get_earliest_htlc_resolution_time() > cutoff_time:
+					break
+				resolution_time, htlc = ch_in_dir.pop_htlc()
+				if TRACE:
+					logger.debug("Released HTLC %s with resolution time %s", htlc, resolution_time)
+				if htlc.desired_result is True:
+					self.shift_revenue(from_node, to_node, FeeType.SUCCESS, htlc.success_fee)
+			if TRACE:
+				logger.debug("No more HTLCs to resolve up to time (%s)", cutoff_time)
+			if ch_in_dir.all_slots_free():
+				self.channels_in_directions_with_htlcs.discard(i)
 
 	def attempt_send_payment(self, payment, sender, now, attempt_num=0):
 		# Try sending a payment.
 		# The route (except the sender) is encoded within the payment.
 		# The sender is provided as a separate argument.
 		payment_attempt_id = payment.id + "-" + str(attempt_num)
-		logger.debug(f"{sender} makes payment attempt {payment_attempt_id}")
+		logger.debug("%s makes payment attempt %s", sender, payment_attempt_id)
 		last_node_reached, first_node_not_reached = sender, payment.downstream_node
 		nodes_hit_count = defaultdict(int)
 		# A temporary data structure to store HTLCs before we know if the payment has reached the receiver.
@@ -271,39 +377,42 @@ class LNModel:
 			u_node, d_node = d_node, p.downstream_node
 			last_node_reached, first_node_not_reached = u_node, d_node
 			is_last_hop = p.downstream_payment is None
-			logger.debug(f"Trying to route via cheapest channel from {u_node} to {d_node}")
-			hop = self.get_hop(u_node, d_node)
-			direction = Direction(u_node, d_node)
-			has_free_slot = hop.really_can_forward_in_direction_at_time(direction, now, p.get_amount())
+			logger.debug("Trying to route via cheapest channel from %s to %s", u_node, d_node)
+			# Choose the cheapest channel that can forward the amount and isn't jammed
+			# (see Hop.get_cheapest_channel_really_can_forward).
+			amount = p.get_amount()
+			chosen_ch, chosen_ch_in_dir = next((
+				(ch, ch_in_dir) for ch, ch_in_dir in self.get_channels_in_direction(u_node, d_node)
+				if amount <= ch.get_capacity() and not ch_in_dir.is_jammed(now)), (None, None))
+			has_free_slot = chosen_ch is not None
 			if has_free_slot:
 				# A channel may be able to forward with one free slot,
 				# but we may need multiple slots to store HTLCs already created for this hop if the route is looped.
 				# We now try to ensure (free up) as many slots as we really need!
 				# We may pop some (outdated) HTLCs while doing that, and resolve them.
 				# TODO: what happens after the cheapest channel is jammed?
-				chosen_ch = hop.get_cheapest_channel_really_can_forward(direction, now, p.get_amount())
-				chosen_ch_in_dir = chosen_ch.in_direction(direction)
 				chosen_cid = chosen_ch.get_cid()
-				logger.debug(f"Chosen channel {chosen_cid}")
+				logger.debug("Chosen channel %s", chosen_cid)
 				# Construct an HTLC to keep in a temporary dictionary until we know if we reach the receiver
 				in_flight_htlc = Htlc(payment_attempt_id, p.success_fee, p.desired_result)
-				unstored_htlcs_for_hop[(u_node, d_node)].append((chosen_ch.get_cid(), direction, now + p.processing_delay, in_flight_htlc))
-				num_slots_needed_for_this_hop = len(unstored_htlcs_for_hop[(u_node, d_node)])
+				unstored_htlcs_for_this_hop = unstored_htlcs_for_hop[(u_node, d_node)]
+				unstored_htlcs_for_this_hop.append((chosen_cid, chosen_ch_in_dir, now + p.processing_delay, in_flight_htlc))
+				num_slots_needed_for_this_hop = len(unstored_htlcs_for_this_hop)
 				has_free_slot, popped_htlcs = chosen_ch_in_dir.ensure_free_slots(now, num_slots_needed=num_slots_needed_for_this_hop)
 				for resolution_time, popped_htlc in popped_htlcs:
 					assert resolution_time <= now
-					logger.debug(f"Popped an HTLC in {u_node}-{d_node}: resolution time {resolution_time} (now is {now}): {popped_htlc}")
+					logger.debug("Popped an HTLC in %s-%s: resolution time %s (now is %s): %s", u_node, d_node, resolution_time, now, popped_htlc)
 					if popped_htlc.desired_result is True:
 						self.shift_revenue(u_node, d_node, FeeType.SUCCESS, popped_htlc.success_fee)
 			if not has_free_slot:
-				logger.debug(f"No channel in {u_node}-{d_node} can forward payment {p.id}!")
+				logger.debug("No channel in %s-%s can forward payment %s!", u_node, d_node, p.id)
 				error_type = ErrorType.NO_SLOTS
 				break
 
 			# Deliberately fail the payment with some probability
-			# Note: this isn't used in simulations.
-			if random() < chosen_ch_in_dir.deliberately_fail_prob:
-				logger.debug(f"{u_node} deliberately failed payment {payment_attempt_id}")
+			# Note: this isn't used in simulations, so we don't draw a random number if the probability is zero.
+			if chosen_ch_in_dir.deliberately_fail_prob > 0 and random() < chosen_ch_in_dir.deliberately_fail_prob:
+				logger.debug("%s deliberately failed payment %s", u_node, payment_attempt_id)
 				error_type = chosen_ch_in_dir.spoofing_error_type
 				break
 
@@ -313,7 +422,7 @@ class LNModel:
 				prob_low_balance = p.get_amount_plus_upfront_fee() / chosen_ch.get_capacity()
 				assert 0 < prob_low_balance <= 1
 				if random() < prob_low_balance:
-					logger.debug(f"{u_node} failed payment {payment_attempt_id}: low balance (probability was {round(prob_low_balance, 8)})")
+					logger.debug("%s failed payment %s: low balance (probability was %s)", u_node, payment_attempt_id, round(prob_low_balance, 8))
 					error_type = ErrorType.LOW_BALANCE
 					break
 
@@ -323,7 +432,7 @@ class LNModel:
 			for fee_type in (FeeType.UPFRONT, FeeType.SUCCESS):
 				fee_required = chosen_ch_in_dir.requires_fee(fee_type, p, zero_success_fee)
 				fee_paid = p.pays_fee(fee_type)
-				logger.debug(f"{fee_type} fee at {chosen_cid} required / offered: {fee_required} / {fee_paid}")
+				logger.debug("%s fee at %s required / offered: %s / %s", fee_type, chosen_cid, fee_required, fee_paid)
 			'''
 			if not chosen_ch_in_dir.enough_fee(p, zero_success_fee):
 				error_type = ErrorType.LOW_FEE
@@ -340,21 +449,21 @@ class LNModel:
 
 		# For each channel in the route, store HTLCs for the current payment
 		if reached_receiver:
-			logger.debug(f"Payment {payment_attempt_id} has reached the receiver")
-			#logger.debug(f"Temporarily saved HTLCs: {unstored_htlcs_for_hop}")
+			logger.debug("Payment %s has reached the receiver", payment_attempt_id)
+			if TRACE:
+				logger.debug("Temporarily saved HTLCs: %s", unstored_htlcs_for_hop)
 			last_node_reached, first_node_not_reached = d_node, None
 			if payment.desired_result is False:
 				error_type = ErrorType.FAILED_DELIBERATELY
-			#logger.debug(f"Temporarily saved HTLCs: {unstored_htlcs_for_hop}")
-			for (u_node, d_node) in unstored_htlcs_for_hop:
-				for chosen_cid, direction, resolution_time, in_flight_htlc in unstored_htlcs_for_hop[(u_node, d_node)]:
-					logger.debug(f"Storing HTLC at {u_node}-{d_node} ({chosen_cid}) to resolve at {resolution_time} (now is {now}): {in_flight_htlc}")
-					ch_in_dir = self.get_hop(u_node, d_node).get_channel(chosen_cid).in_direction(direction)
+			for (u_node, d_node), unstored_htlcs_for_this_hop in unstored_htlcs_for_hop.items():
+				for chosen_cid, ch_in_dir, resolution_time, in_flight_htlc in unstored_htlcs_for_this_hop:
+					logger.debug("Storing HTLC at %s-%s (%s) to resolve at %s (now is %s): %s", u_node, d_node, chosen_cid, resolution_time, now, in_flight_htlc)
 					ch_in_dir.push_htlc(resolution_time, in_flight_htlc)
+					self.channels_in_directions_with_htlcs.add(self.channel_in_direction_index[ch_in_dir])
 		else:
-			logger.debug(f"Payment {payment_attempt_id} has failed at {last_node_reached} and has NOT reached the receiver")
+			logger.debug("Payment %s has failed at %s and has NOT reached the receiver", payment_attempt_id, last_node_reached)
 
-		logger.debug(f"Hit count: {nodes_hit_count}")
+		logger.debug("Hit count: %s", nodes_hit_count)
 		assert reached_receiver or error_type is not None
 		return reached_receiver, last_node_reached, first_node_not_reached, error_type, nodes_hit_count
 
@@ -232,6 +232,46 @@ def test_get_routing_graph_from_json():
 		xy_edge = ln_model.routing_graph.get_edge_data(x, y)
 		assert(len(xy_edge) == 1)
 
+	# each enabled channel direction is also stored in the flat list of channel directions
+	assert(len(ln_model.channels_in_directions) == g.number_of_edges())
+	for x, y, ch_in_dir in ln_model.channels_in_directions:
+		assert(any(
+			ch.in_direction(Direction(x, y)) is ch_in_dir
+			for ch in ln_model.get_hop(x, y).get_all_channels()))
+
+
+def test_get_channels_in_direction():
+	ln_model = get_ln_model()
+	# channels are returned in the same order as the hop has them
+	for x, y in ((b, c), (c, b), (a, b)):
+		direction = Direction(x, y)
+		expected_channels = ln_model.get_hop(x, y).get_channels_with_condition(
+			lambda ch: ch.is_enabled_in_direction(direction))
+		channels_in_direction = ln_model.get_channels_in_direction(x, y)
+		assert([ch for ch, _ in channels_in_direction] == expected_channels)
+		assert(all(ch.in_direction(direction) is ch_in_dir for ch, ch_in_dir in channels_in_direction))
+		assert(ln_model.can_forward(x, y, time=0) == ln_model.get_hop(x, y).can_forward(direction, time=0))
+	assert(len(ln_model.get_channels_in_direction(c, b)) == 3)
+	# direction Dave->Charlie is disabled
+	assert(ln_model.get_channels_in_direction(d, c) == [])
+	assert(not ln_model.can_forward(d, c, time=0))
+
+
+def test_get_cheapest_channel_maybe_can_forward():
+	ln_model = get_ln_model()
+	# the hop picks the same channel via the hop graph
+	for x, y in ((b, c), (c, b), (a, b)):
+		direction = Direction(x, y)
+		expected_ch = ln_model.get_hop(x, y).get_cheapest_channel_maybe_can_forward(direction, 10)
+		cid, ch_in_dir = ln_model.get_cheapest_channel_maybe_can_forward(x, y, 10)
+		assert(cid == expected_ch.get_cid())
+		assert(ch_in_dir is expected_ch.in_direction(direction))
+	# no channel can forward more than its capacity
+	capacity = max(ch.get_capacity() for ch, _ in ln_model.get_channels_in_direction(c, b))
+	assert(ln_model.get_cheapest_channel_maybe_can_forward(c, b, capacity + 1) == (None, None))
+	# direction Dave->Charlie is disabled
+	assert(ln_model.get_cheapest_channel_maybe_can_forward(d, c, 10) == (None, None))
+
 
 def test_revenue():
 	ln_model = get_ln_model()
@@ -249,6 +289,15 @@ def test_revenue():
 	ln_model.subtract_revenue("Alice", FeeType.UPFRONT, 20)
 	assert(ln_model.get_revenue("Alice", FeeType.SUCCESS) == 10)
 	assert(ln_model.get_revenue("Alice", FeeType.UPFRONT) == -20)
+	# revenues of multiple nodes are returned in the order of nodes
+	nodes = ["Bob", "Alice"]
+	assert(list(ln_model.get_revenues(nodes, FeeType.SUCCESS)) == [0, 10])
+	assert(list(ln_model.get_revenues(nodes, FeeType.UPFRONT)) == [0, -20])
+	assert(list(ln_model.get_total_revenues(nodes)) == [0, -10])
+	# Alice pays Bob 5 in upfront fee
+	ln_model.shift_revenue("Alice", "Bob", FeeType.UPFRONT, 5)
+	assert(list(ln_model.get_revenues(nodes, FeeType.UPFRONT)) == [5, -25])
+	assert(list(ln_model.get_revenues(nodes, FeeType.SUCCESS)) == [0, 10])
 
 
 def test_get_routing_graph_for_amount(example_amounts):
@@ -291,6 +340,43 @@ def test_get_routes(example_amounts):
 	assert(len(routes_list) == 0)
 
 
+def test_get_routes_cached(example_amounts):
+	ln_model = get_ln_model()
+	routes_list = [p for p in ln_model.get_shortest_routes(a, d, example_amounts["medium"])]
+	assert(routes_list == [[a, b, c, d]])
+	assert(len(ln_model.shortest_routes_cache) == 1)
+	# once all routes are found, the route search is dropped
+	assert(all(routes is None for _, routes in ln_model.shortest_routes_cache.values()))
+	# a slightly different amount filters the graph in the same way and re-uses the cached routes
+	assert(ln_model.get_capacity_class(example_amounts["medium"] + 1) == ln_model.get_capacity_class(example_amounts["medium"]))
+	routes_list = [p for p in ln_model.get_shortest_routes(a, d, example_amounts["medium"] + 1)]
+	assert(routes_list == [[a, b, c, d]])
+	assert(len(ln_model.shortest_routes_cache) == 1)
+	# modifying a returned route doesn't affect the cache
+	routes_list[0].append(a)
+	assert([p for p in ln_model.get_shortest_routes(a, d, example_amounts["medium"])] == [[a, b, c, d]])
+	# changing capacities invalidates the cache
+	ln_model.set_capacity(a, b, example_amounts["small"])
+	assert(len(ln_model.shortest_routes_cache) == 0)
+	routes_list = [p for p in ln_model.get_shortest_routes(a, d, example_amounts["medium"])]
+	assert(len(routes_list) == 0)
+
+
+def test_get_routes_cache_evicts_least_recently_used(example_amounts):
+	ln_model = LNModel(
+		get_example_snapshot_json(),
+		default_num_slots_per_channel_in_direction=2,
+		no_balance_failures=True,
+		max_num_cached_route_searches=2)
+	amount = example_amounts["small"]
+	list(ln_model.get_shortest_routes(a, d, amount))
+	list(ln_model.get_shortest_routes(b, d, amount))
+	# using (a, d) again makes (b, d) the least recently used key
+	list(ln_model.get_shortest_routes(a, d, amount))
+	list(ln_model.get_shortest_routes(c, d, amount))
+	assert([key[:2] for key in ln_model.shortest_routes_cache] == [(a, d), (c, d)])
+
+
 # test directionality: there must not be a route B <--- C for a big amount
 def test_directionality(example_amounts):
 	ln_model = get_ln_model()
@@ -360,3 +446,43 @@ def test_balance_failure():
 	assert(last_node_reached == "Alice")
 	assert(first_node_not_reached == "Bob")
 	assert(error_type == ErrorType.LOW_BALANCE)
+
+
+def test_finalize_in_flight_htlcs():
+	ln_model = get_ln_model()
+	p_bc = Payment(
+		downstream_payment=None,
+		downstream_node="Charlie",
+		upfront_fee_function=lambda a: 0,
+		success_fee_function=lambda a: 0,
+		desired_result=True,
+		processing_delay=1,
+		last_hop_body=10)
+	# Alice pays Bob a success fee of 5 when the HTLCs resolve
+	p_abc = Payment(
+		downstream_payment=p_bc,
+		downstream_node="Bob",
+		upfront_fee_function=lambda a: 0,
+		success_fee_function=lambda a: 5)
+	assert(not ln_model.channels_in_directions_with_htlcs)
+	reached_receiver, _, _, _, _ = ln_model.attempt_send_payment(p_abc, sender="Alice", now=0)
+	assert(reached_receiver)
+	# only the channel directions along the route have HTLCs
+	assert(len(ln_model.channels_in_directions_with_htlcs) == 2)
+	ch_in_dirs_with_htlcs = {}
+	for i in ln_model.channels_in_directions_with_htlcs:
+		from_node, to_node, ch_in_dir = ln_model.channels_in_directions[i]
+		ch_in_dirs_with_htlcs[(from_node, to_node)] = ch_in_dir
+	assert(set(ch_in_dirs_with_htlcs) == {("Alice", "Bob"), ("Bob", "Charlie")})
+	assert(all(ch_in_dir.get_num_slots_occupied() == 1 for ch_in_dir in ch_in_dirs_with_htlcs.values()))
+	# the HTLCs are not yet outdated
+	ln_model.finalize_in_flight_htlcs(cutoff_time=0)
+	assert(all(ch_in_dir.get_num_slots_occupied() == 1 for ch_in_dir in ch_in_dirs_with_htlcs.values()))
+	assert(len(ln_model.channels_in_directions_with_htlcs) == 2)
+	# now they are
+	ln_model.finalize_in_flight_htlcs(cutoff_time=1)
+	assert(all(ch_in_dir.get_num_slots_occupied() == 0 for ch_in_dir in ch_in_dirs_with_htlcs.values()))
+	assert(not ln_model.channels_in_directions_with_htlcs)
+	assert(ln_model.get_revenue("Alice", FeeType.SUCCESS) == -5)
+	assert(ln_model.get_revenue("Bob", FeeType.SUCCESS) == 5)
+	assert(ln_model.get_revenue("Charlie", FeeType.SUCCESS) == 0)
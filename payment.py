@@ -12,6 +12,12 @@ class Payment:
 		For the last-hop payment, the downstream payment is None.
 	'''
 
+	# One Payment is created per hop of every route we send along (nested, see above).
+	# Slots make the onion compact and its fields (read on every hop) faster to access.
+	__slots__ = (
+		"downstream_payment", "downstream_node", "id", "body", "success_fee", "processing_delay",
+		"desired_result", "amount", "upfront_fee", "amount_plus_upfront_fee")
+
 	def __init__(
 		self,
 		downstream_payment,
@@ -68,7 +74,7 @@ class Payment:
 		self.downstream_payment = downstream_payment
 		self.downstream_node = downstream_node
 		if is_last_hop:
-			logger.debug(f"Receiver will get {last_hop_body} (without fees)")
+			logger.debug("Receiver will get %s (without fees)", last_hop_body)
 			assert last_hop_body > 0
 			self.id = generate_id()
 			# payment body might have been adjusted by the sender to exclude upfront fee
@@ -86,9 +92,13 @@ class Payment:
 			# copy over the processing delay from downstream (delay on all hops is the same)
 			self.processing_delay = downstream_payment.processing_delay
 			self.desired_result = downstream_payment.desired_result
+		# a payment doesn't change after construction but may be sent many times (e.g., a jam is re-sent in each attempt)
+		# hence, we calculate the amounts once here
+		self.amount = self.body + self.success_fee
 		# upfront-fee is calculated based on _amount_
 		downstream_upfront_fee = 0 if downstream_payment is None else downstream_payment.upfront_fee
-		self.upfront_fee = upfront_fee_function(self.get_amount()) + downstream_upfront_fee
+		self.upfront_fee = upfront_fee_function(self.amount) + downstream_upfront_fee
+		self.amount_plus_upfront_fee = self.amount + self.upfront_fee
 
 	def get_body(self):
 		return self.body
@@ -104,10 +114,10 @@ class Payment:
 		return self.pays_fee(FeeType.UPFRONT) + self.pays_fee(FeeType.SUCCESS)
 
 	def get_amount(self):
-		return self.get_body() + self.pays_fee(FeeType.SUCCESS)
+		return self.amount
 
 	def get_amount_plus_upfront_fee(self):
-		return self.get_amount() + self.pays_fee(FeeType.UPFRONT)
+		return self.amount_plus_upfront_fee
 
 	def __repr__(self):  # pragma: no cover
 		s = "\nPayment with amount: 	" + str(self.amount)
@@ -51,6 +51,7 @@ def test_manual_payment_creation(example_payment_upfront_fee_function, example_p
 	for p in [p_ab, p_bc, p_cd]:
 		assert(p.processing_delay == 1)
 		assert(p.desired_result is True)
+		assert(not hasattr(p, "__dict__"))
 	assert(p_ab.body == 110)
 	assert(p_ab.success_fee == 21)
 	assert(p_ab.upfront_fee == 14)
@@ -63,6 +64,9 @@ def test_manual_payment_creation(example_payment_upfront_fee_function, example_p
 	assert(p_cd.success_fee == 0)
 	assert(p_cd.upfront_fee == 4)
 	assert(p_cd.downstream_node is None)
+	# amount = body + success-case fee
+	assert(p_ab.get_amount() == 131)
+	assert(p_ab.get_amount_plus_upfront_fee() == 145)
 
 
 @pytest.fixture
@@ -5,6 +5,8 @@ from params import ProtocolParams
 
 import logging
 logger = logging.getLogger(__name__)
+# Set to True to also log (very verbose) per-step diagnostics of the route search.
+TRACE = False
 
 
 class Router:
@@ -82,16 +84,21 @@ class Router:
 		found_routes = set()
 		target_node_pairs_per_route = self.max_target_node_pairs_per_route
 		while target_node_pairs_per_route >= min_target_node_pairs_per_route:
-			#logger.debug(f"Looking for routes with {target_node_pairs_per_route} target node pairs")
+			if TRACE:
+				logger.debug("Looking for routes with %s target node pairs", target_node_pairs_per_route)
 			for target_node_pairs_subset in itertools.combinations(self.target_node_pairs, target_node_pairs_per_route):
-				#logger.debug(f"Generating routes via permutation of length {len(target_node_pairs_subset)}...")
+				if TRACE:
+					logger.debug("Generating routes via permutation of length %s...", len(target_node_pairs_subset))
 				for hops_permutation in itertools.permutations(target_node_pairs_subset):
-					#logger.debug(f"Considering permutation {hops_permutation}")
+					if TRACE:
+						logger.debug("Considering permutation %s", hops_permutation)
 					route = self.get_shortest_route_via_hops(hops_permutation)
 					if route is not None:
-						#logger.debug(f"Found route of length {len(route)}")
+						if TRACE:
+							logger.debug("Found route of length %s", len(route))
 						if route in found_routes:
-							#logger.info(f"Route already found, skipping")
+							if TRACE:
+								logger.debug("Route already found, skipping")
 							continue
 						else:
 							found_routes.add(route)
@@ -100,17 +107,20 @@ class Router:
 
 	def is_suitable(self, route):
 		if len(route) > self.max_route_length:
-			#logger.debug(f"Route {route} too long (length {len(route)} > {self.max_route_length}), discarding")
+			if TRACE:
+				logger.debug("Route %s too long (length %s > %s), discarding", route, len(route), self.max_route_length)
 			return False
 		if Router.has_repeated_hop(route) and not self.allow_repeated_hops:
-			#logger.debug(f"Route {route} has repeated hop, discarding")
+			if TRACE:
+				logger.debug("Route %s has repeated hop, discarding", route)
 			return False
 		return True
 
 	def get_shortest_route_via_hops(self, hops_permutation):
 		# get the shortest route that goes through given hops in a given order (one permutation)
 		# TODO: should we return one route, or yield multiple routes if possible via a given permutation?
-		#logger.debug(f"Searching for route from {self.sender} to {self.receiver} via {hops_permutation}")
+		if TRACE:
+			logger.debug("Searching for route from %s to %s via %s", self.sender, self.receiver, hops_permutation)
 		prev_d_node = None
 		for i, (u_node, d_node) in enumerate(hops_permutation):
 			assert self.g.has_edge(u_node, d_node), (u_node, d_node)
@@ -119,33 +129,41 @@ class Router:
 				if self.paths_from_sender[first_hop_first_node] is None:
 					return None
 				route = self.paths_from_sender[first_hop_first_node].copy()
-				#logger.debug(f"Initial route to {first_hop_first_node} is {route}")
+				if TRACE:
+					logger.debug("Initial route to %s is %s", first_hop_first_node, route)
 				assert(route[0] == self.sender and route[-1] == first_hop_first_node)
 			else:
 				if not nx.has_path(self.g, prev_d_node, u_node):
-					#logger.debug(f"No path from {prev_d_node} to {u_node}")
+					if TRACE:
+						logger.debug("No path from %s to %s", prev_d_node, u_node)
 					return None
 				elif prev_d_node != u_node:
 					subroute = nx.shortest_path(self.g, prev_d_node, u_node)[1:]
-					#logger.debug(f"Sub-route from {prev_d_node} to {u_node} is: {subroute}")
+					if TRACE:
+						logger.debug("Sub-route from %s to %s is: %s", prev_d_node, u_node, subroute)
 					route.extend(subroute)
-					#logger.debug(f"Route of length {len(route)} now is {route}")
-			#logger.debug(f"Appending d_node {d_node}")
+					if TRACE:
+						logger.debug("Route of length %s now is %s", len(route), route)
+			if TRACE:
+				logger.debug("Appending d_node %s", d_node)
 			route.append(d_node)
-			#logger.debug(f"Route of length {len(route)} now is {route}")
+			if TRACE:
+				logger.debug("Route of length %s now is %s", len(route), route)
 			if not self.is_suitable(route):
 				return None
 			prev_d_node = d_node
 		if self.paths_to_receiver[prev_d_node] is None:
 			return None
 		path_to_receiver = self.paths_to_receiver[prev_d_node]
-		#logger.debug(f"path to receiver: {path_to_receiver}")
-		#logger.debug(f"Appending {path_to_receiver[1:]}")
+		if TRACE:
+			logger.debug("path to receiver: %s", path_to_receiver)
+			logger.debug("Appending %s", path_to_receiver[1:])
 		route.extend(path_to_receiver[1:])
 		if not self.is_suitable(route):
 			return None
 		assert(route[0] == self.sender and route[-1] == self.receiver)
-		#logger.debug(f"Returning {route}")
+		if TRACE:
+			logger.debug("Returning %s", route)
 		assert(self.allow_repeated_hops or not Router.has_repeated_hop(route))
 		return tuple(route)
 
@@ -163,12 +181,14 @@ class Router:
 		for route_hop in Router.get_hops(route):
 			if route_hop == current_hop:
 				if i == len(permutation) - 1:
-					#logger.debug(f"Last hop {route_hop} at position {i} is in route")
+					if TRACE:
+						logger.debug("Last hop %s at position %s is in route", route_hop, i)
 					return None
 				else:
 					i += 1
 					current_hop = permutation[i]
-					#logger.debug(f"Current hop {route_hop} at position {i} is in route")
+					if TRACE:
+						logger.debug("Current hop %s at position %s is in route", route_hop, i)
 		return i
 
 	@staticmethod
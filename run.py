@@ -154,6 +154,12 @@ def main():
 		action="store_true",
 		help="Only store revenues of the target node (must be present) and the jammer's nodes."
 	)
+	parser.add_argument(
+		"--num_processes",
+		default=1,
+		type=int,
+		help="The number of worker processes to distribute simulation runs across (requires fork, e.g., Linux or macOS; otherwise runs are sequential)."
+	)
 	parser.add_argument(
 		"--seed",
 		type=int,
@@ -281,7 +287,8 @@ def main():
 			honest_payments_per_second=honest_payments_per_second,
 			target_channel_capacity=target_channel_capacity,
 			compact_output=(args.scenario == "real"),
-			extrapolate_jamming_revenues=args.extrapolate_jamming_revenues)
+			extrapolate_jamming_revenues=args.extrapolate_jamming_revenues,
+			num_processes=args.num_processes)
 		breakeven_upfront_coeffs.append((target_channel_capacity, breakeven_upfront_base_coeff))
 		scenario.results_to_json_file(start_timestamp + scenario_num)
 		scenario.results_to_csv_file(start_timestamp + scenario_num)
@@ -195,7 +195,8 @@ class Scenario:
 		num_jamming_batches=None,
 		compact_output=False,
 		normalize_results_for_duration=True,
-		extrapolate_jamming_revenues=False):
+		extrapolate_jamming_revenues=False,
+		num_processes=1):
 		'''
 			- duration
 				The simulation duration (seconds). Schedules will be generated with this as their end time.
@@ -241,6 +242,9 @@ class Scenario:
 
 			- extrapolate_jamming_revenues
 				Extrapolate jamming results based on jam batch delay and fees.
+
+			- num_processes
+				The number of worker processes to distribute simulation runs across.
 		'''
 
 		assert max_target_node_pairs_per_route is not None or max_route_length is not None
@@ -286,7 +290,8 @@ class Scenario:
 			target_node_pairs=self.target_node_pairs,
 			target_node=self.target_node,
 			max_target_node_pairs_per_route=max_target_node_pairs_per_route,
-			jammer_must_route_via_nodes=self.jammer_must_route_via_nodes)
+			jammer_must_route_via_nodes=self.jammer_must_route_via_nodes,
+			num_processes=num_processes)
 		results_jamming = j_sim.run_simulation_series(
 			schedule_generation_function=(
 				lambda duration: JammingSchedule(duration=jamming_schedule_duration)),
@@ -302,7 +307,8 @@ class Scenario:
 			max_num_routes=max_num_routes_honest,
 			max_num_attempts_per_route=max_num_attempts_per_route_honest,
 			max_route_length=max_route_length,
-			num_runs_per_simulation=num_runs_per_simulation)
+			num_runs_per_simulation=num_runs_per_simulation,
+			num_processes=num_processes)
 		results_honest = h_sim.run_simulation_series(
 			schedule_generation_function=(
 				lambda duration: HonestSchedule(
@@ -1,4 +1,4 @@
-from queue import PriorityQueue
+from heapq import heappush, heappop
 from random import choice
 from numpy.random import exponential, lognormal
 
@@ -16,33 +16,40 @@ class GenericSchedule:
 
 	def __init__(self, duration=0):
 		self.end_time = duration
-		self.schedule = PriorityQueue()
+		# a heap of (time, event) tuples (the simulation is single-threaded, so we don't need queue.PriorityQueue)
+		self.schedule = []
 
 	def get_num_events(self):
-		return self.schedule.qsize()
+		return len(self.schedule)
 
 	def get_event(self):
 		# return event time and the event itself
-		if self.schedule.empty():
+		if not self.schedule:
 			return None, None
-		time, event = self.schedule.get_nowait()
+		time, event = heappop(self.schedule)
 		return time, event
 
+	def peek_time(self):
+		# return the time of the earliest event without removing it
+		if not self.schedule:
+			return None
+		return self.schedule[0][0]
+
 	def get_all_events(self):
 		# Only used for debugging. Note: this clears the queue!
 		timed_events = []
-		while not self.schedule.empty():
-			time, event = self.schedule.get_nowait()
+		while self.schedule:
+			time, event = heappop(self.schedule)
 			timed_events.append((time, event))
 		return timed_events
 
 	def no_more_events(self):
-		return self.schedule.empty()
+		return not self.schedule
 
 	def put_event(self, event_time, event, current_time=-1):
 		# prohibit inserting events into the past or after end time
 		assert current_time < event_time <= self.end_time
-		self.schedule.put_nowait((event_time, event))
+		heappush(self.schedule, (event_time, event))
 
 	def __repr__(self):  # pragma: no cover
 		s = "\nSchedule:\n"
@@ -29,6 +29,7 @@ def test_schedule_get_put(example_schedule):
 	# construct new event
 	event_time, new_event = 2, Event("Bob", "Charlie", 2000, 2, False)
 	example_schedule.put_event(event_time, new_event, current_time=1)
+	assert(example_schedule.peek_time() == 2)
 	time, event = example_schedule.get_event()
 	assert(time == 2)
 	# we can't compare with == Event(...): id's would be different
@@ -43,6 +44,7 @@ def test_get_all_events():
 	sch = GenericSchedule(duration=10)
 	assert(sch.get_num_events() == 0)
 	assert(sch.get_event() == (None, None))
+	assert(sch.peek_time() is None)
 	sch.put_event(1, Event("Alice", "Bob", 1000, 2, True))
 	sch.put_event(0, Event("Alice", "Bob", 2000, 2, True))
 	assert(sch.get_num_events() == 2)
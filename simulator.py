@@ -1,16 +1,35 @@
-from statistics import mean
-from copy import deepcopy
+from math import floor
 from functools import partial
-from collections import defaultdict
+from random import randrange, seed
+import multiprocessing
+import numpy as np
 
 from direction import Direction
-from channelindirection import ErrorType, FeeType, ChannelInDirection
+from channelindirection import ErrorType, ChannelInDirection
 from params import ProtocolParams, FeeParams
 from payment import Payment
 from router import Router
 
 import logging
 logger = logging.getLogger(__name__)
+# Set to True to also log (very verbose) diagnostics of the jamming loop.
+TRACE = False
+
+
+# A function to be called by worker processes, along with its fixed arguments.
+# Workers are forked, so they inherit it without pickling
+# (schedule generation functions are usually lambdas, which can't be pickled).
+call_for_workers = None
+
+
+def call_in_worker(task):
+	# Call the inherited function in a worker process with the task's own arguments.
+	# Each task is seeded separately, otherwise all forked workers would produce the same random values.
+	function, fixed_args = call_for_workers
+	task_seed, task_args = task
+	seed(task_seed)
+	np.random.seed(task_seed)
+	return function(*fixed_args, *task_args)
 
 
 class Simulator:
@@ -26,7 +45,8 @@ class Simulator:
 		max_num_routes,
 		max_num_attempts_per_route,
 		max_route_length,
-		num_runs_per_simulation):
+		num_runs_per_simulation,
+		num_processes=1):
 		'''
 			- ln_model
 				An instance of LNModel to run the simulations with.
@@ -45,12 +65,17 @@ class Simulator:
 
 			- num_runs_per_simulation
 				The number of runs per simulation to average the results across.
+
+			- num_processes
+				The number of worker processes to distribute simulations (or runs of a simulation) across.
 		'''
 		self.ln_model = ln_model
 		self.max_num_routes = max_num_routes
 		self.max_num_attempts_per_route = max_num_attempts_per_route
 		self.max_route_length = max_route_length
 		self.num_runs_per_simulation = num_runs_per_simulation
+		assert num_processes >= 1
+		self.num_processes = num_processes
 
 	def run_simulation_series(
 		self,
@@ -63,67 +88,116 @@ class Simulator:
 		'''
 			Run a series of simulations, iterating through ranges of upfront fee coefficient pairs.
 		'''
-		simulation_series_results = []
 		self.normalize_results_for_duration = normalize_results_for_duration
 		if num_runs_per_simulation is None:
 			num_runs_per_simulation = self.num_runs_per_simulation
-		total_num_simulations, simulation_num = len(upfront_base_coeff_range) * len(upfront_rate_coeff_range), 0
-		for upfront_base_coeff in upfront_base_coeff_range:
-			for upfront_rate_coeff in upfront_rate_coeff_range:
-				simulation_num += 1
-				percent_done = round(100 * simulation_num / total_num_simulations)
-				logger.debug(f"Starting simulation {simulation_num} / {total_num_simulations} ({percent_done} % done) with coeffs: base {upfront_base_coeff}, rate {upfront_rate_coeff}")
-				self.ln_model.set_upfront_fee_from_coeff_for_all(upfront_base_coeff, upfront_rate_coeff)
-				stats, revenues = self.run_simulation(schedule_generation_function, duration, num_runs_per_simulation, normalize_results_for_duration)
-				result = {
-					"upfront_base_coeff": upfront_base_coeff,
-					"upfront_rate_coeff": upfront_rate_coeff,
-					"stats": stats,
-					"revenues": revenues
-				}
-				simulation_series_results.append(result)
+		coeffs = [
+			(upfront_base_coeff, upfront_rate_coeff)
+			for upfront_base_coeff in upfront_base_coeff_range
+			for upfront_rate_coeff in upfront_rate_coeff_range]
+		fixed_args = (schedule_generation_function, duration, num_runs_per_simulation, normalize_results_for_duration)
+		if self.can_use_worker_processes(len(coeffs)):
+			# simulations for different coefficients are independent: each worker sets fees in its own copy of the model
+			logger.debug("Distributing %s simulations across %s processes", len(coeffs), self.num_processes)
+			return self.map_in_worker_processes(self.run_simulation_for_coeffs, fixed_args, coeffs)
+		simulation_series_results = []
+		for simulation_num, (upfront_base_coeff, upfront_rate_coeff) in enumerate(coeffs, start=1):
+			percent_done = round(100 * simulation_num / len(coeffs))
+			logger.debug("Starting simulation %s / %s (%s %% done) with coeffs: base %s, rate %s", simulation_num, len(coeffs), percent_done, upfront_base_coeff, upfront_rate_coeff)
+			simulation_series_results.append(self.run_simulation_for_coeffs(*fixed_args, upfront_base_coeff, upfront_rate_coeff))
 		return simulation_series_results
 
+	def run_simulation_for_coeffs(
+		self,
+		schedule_generation_function,
+		duration,
+		num_runs_per_simulation,
+		normalize_results_for_duration,
+		upfront_base_coeff,
+		upfront_rate_coeff):
+		'''
+			Set upfront fees for all channels from the given coefficients and run a simulation.
+		'''
+		self.ln_model.set_upfront_fee_from_coeff_for_all(upfront_base_coeff, upfront_rate_coeff)
+		stats, revenues = self.run_simulation(schedule_generation_function, duration, num_runs_per_simulation, normalize_results_for_duration)
+		result = {
+			"upfront_base_coeff": upfront_base_coeff,
+			"upfront_rate_coeff": upfront_rate_coeff,
+			"stats": stats,
+			"revenues": revenues
+		}
+		return result
+
+	def can_use_worker_processes(self, num_tasks):
+		# Worker processes are only worth it for multiple tasks.
+		# Workers are daemonic and can't start their own workers, so nested tasks run sequentially.
+		if self.num_processes <= 1 or num_tasks <= 1 or multiprocessing.current_process().daemon:
+			return False
+		# Workers must be forked (see call_for_workers), which is not available on all platforms (e.g., Windows).
+		if "fork" not in multiprocessing.get_all_start_methods():
+			logger.warning("Can't fork worker processes on this platform, running %s tasks sequentially", num_tasks)
+			return False
+		return True
+
+	def map_in_worker_processes(self, function, fixed_args, tasks_args):
+		# Call function(*fixed_args, *task_args) for each task in forked worker processes.
+		# Return the results in the order of tasks.
+		global call_for_workers
+		call_for_workers = (function, fixed_args)
+		# draw the seeds here, so that results are reproducible if the main process is seeded
+		tasks = [(randrange(2**32), task_args) for task_args in tasks_args]
+		try:
+			with multiprocessing.get_context("fork").Pool(min(self.num_processes, len(tasks))) as pool:
+				return pool.map(call_in_worker, tasks)
+		finally:
+			call_for_workers = None
+
 	def run_simulation(self, schedule_generation_function, duration, num_runs_per_simulation, normalize_results_for_duration=False):
 		'''
 			Run a simulation self.num_runs_per_simulation times and average the results.
 		'''
-		tmp_num_sent, tmp_num_failed, tmp_num_reached_receiver, tmp_num_hit_target_node = [], [], [], []
-		tmp_revenues = defaultdict(list)
-		for i in range(num_runs_per_simulation):
-			logger.debug(f"Simulation {i + 1} of {num_runs_per_simulation}")
-			# we can't generate schedules out of cycle because they get depleted during execution
-			# (PriorityQueue does not support copying.)
-			schedule = schedule_generation_function(duration)
-			num_sent, num_failed, num_reached_receiver, num_hit_target_node = self.execute_schedule(schedule)
-			logger.debug(f"Hit target node: {num_hit_target_node}")
-			logger.debug(f"{num_sent} sent, {num_failed} failed, {num_reached_receiver} reached receiver, {num_hit_target_node} hit target")
-			normalizer = duration if normalize_results_for_duration else 1
-
-			def normalized(value):
-				assert normalizer > 0
-				return value if normalizer == 1 else value / normalizer
-			tmp_num_sent.append(normalized(num_sent))
-			tmp_num_failed.append(normalized(num_failed))
-			tmp_num_reached_receiver.append(normalized(num_reached_receiver))
-			tmp_num_hit_target_node.append(normalized(num_hit_target_node))
-			for node in self.nodes_hit:
-				tmp_revenues[node].append(normalized(
-					self.ln_model.get_revenue(node, FeeType.UPFRONT)
-					+ self.ln_model.get_revenue(node, FeeType.SUCCESS)))
-		logger.debug(f"Average hit target node: {mean(tmp_num_hit_target_node)}")
-		stats = {
-			"num_sent": mean(tmp_num_sent),
-			"num_failed": mean(tmp_num_failed),
-			"num_reached_receiver": mean(tmp_num_reached_receiver),
-			"num_hit_target_node": mean(tmp_num_hit_target_node)
-		}
-		revenues = dict.fromkeys(self.ln_model.hop_graph.nodes, 0)
-		#logger.debug(f"Hit nodes: {self.nodes_hit}")
-		for node in self.nodes_hit:
-			revenues[node] = mean(tmp_revenues[node])
+		# one row of stats and one row of per-node revenues per run
+		stats_names = ("num_sent", "num_failed", "num_reached_receiver", "num_hit_target_node")
+		tmp_stats = np.zeros((num_runs_per_simulation, len(stats_names)), dtype=np.float64)
+		nodes = list(self.ln_model.hop_graph.nodes)
+		tmp_revenues = np.zeros((num_runs_per_simulation, len(nodes)), dtype=np.float64)
+		run_results = self.execute_runs(schedule_generation_function, duration, num_runs_per_simulation, nodes)
+		for i, (num_sent, num_failed, num_reached_receiver, num_hit_target_node, revenues) in enumerate(run_results):
+			tmp_stats[i] = (num_sent, num_failed, num_reached_receiver, num_hit_target_node)
+			tmp_revenues[i] = revenues
+		if normalize_results_for_duration:
+			assert duration > 0
+			tmp_stats /= duration
+			tmp_revenues /= duration
+		stats = dict(zip(stats_names, tmp_stats.mean(axis=0).tolist()))
+		logger.debug("Average hit target node: %s", stats["num_hit_target_node"])
+		# nodes that haven't been hit in a run have zero revenue in that run
+		revenues = dict(zip(nodes, tmp_revenues.mean(axis=0).tolist()))
 		return stats, revenues
 
+	def execute_runs(self, schedule_generation_function, duration, num_runs, nodes):
+		# Execute num_runs independent simulation runs and return their results in order.
+		fixed_args = (schedule_generation_function, duration, nodes)
+		if self.can_use_worker_processes(num_runs):
+			logger.debug("Distributing %s simulation runs across %s processes", num_runs, self.num_processes)
+			return self.map_in_worker_processes(self.execute_run, fixed_args, [()] * num_runs)
+		run_results = []
+		for i in range(num_runs):
+			logger.debug("Simulation %s of %s", i + 1, num_runs)
+			run_results.append(self.execute_run(*fixed_args))
+		return run_results
+
+	def execute_run(self, schedule_generation_function, duration, nodes):
+		# Execute one simulation run.
+		# Return the run's stats and the total revenues of nodes (in the order of nodes).
+		# we can't generate schedules out of cycle because they get depleted during execution
+		schedule = schedule_generation_function(duration)
+		num_sent, num_failed, num_reached_receiver, num_hit_target_node = self.execute_schedule(schedule)
+		logger.debug("Hit target node: %s", num_hit_target_node)
+		logger.debug("%s sent, %s failed, %s reached receiver, %s hit target", num_sent, num_failed, num_reached_receiver, num_hit_target_node)
+		revenues = self.ln_model.get_total_revenues(nodes)
+		return num_sent, num_failed, num_reached_receiver, num_hit_target_node, revenues
+
 	def reset(self):
 		self.ln_model.reset_all_slots()
 		self.ln_model.reset_all_revenues()
@@ -131,7 +205,6 @@ class Simulator:
 		self.num_sent_total, self.num_failed_total, self.num_reached_receiver_total = 0, 0, 0
 		self.num_hit_target_node = 0
 		self.routes_by_length = dict.fromkeys(range(self.max_route_length), 0)
-		self.nodes_hit = set()
 
 	def handle_event(self, event):
 		raise NotImplementedError("handle_event must be implemented in a Simulator sub-class (such as HonestSimulator or JammingSimulator)")
@@ -139,24 +212,26 @@ class Simulator:
 	def execute_schedule(self, schedule):
 		self.reset()
 		self.schedule = schedule
-		while not self.schedule.no_more_events():
-			new_time, event = self.schedule.get_event()
+		# Bind the attributes used on every event to locals.
+		# Note: self.now must still be updated per event, as event handlers read it.
+		no_more_events, peek_time, get_event = schedule.no_more_events, schedule.peek_time, schedule.get_event
+		handle_event, end_time = self.handle_event, schedule.end_time
+		while not no_more_events() and peek_time() <= end_time:
+			new_time, event = get_event()
 			if new_time > self.now:
-				logger.debug(f"Current time: {new_time}")
-			if new_time > self.schedule.end_time:
-				break
+				logger.debug("Current time: %s", new_time)
 			self.now = new_time
-			logger.debug(f"Got event: {event}")
-			self.handle_event(event)
+			logger.debug("Got event: %s", event)
+			handle_event(event)
 		if self.schedule.no_more_events():
-			logger.debug(f"Depleted the schedule with end time {self.schedule.end_time}, last event was at {self.now}")
+			logger.debug("Depleted the schedule with end time %s, last event was at %s", self.schedule.end_time, self.now)
 		else:
-			logger.debug(f"Reached schedule end time {self.schedule.end_time}, last event was at {self.now}")
+			logger.debug("Reached schedule end time %s, last event was at %s", self.schedule.end_time, self.now)
 		self.now = self.schedule.end_time
-		logger.debug(f"Finalizing in-flight HTLCs...")
+		logger.debug("Finalizing in-flight HTLCs...")
 		self.ln_model.finalize_in_flight_htlcs(self.now)
-		logger.debug(f"Schedule executed: {self.num_sent_total} sent, {self.num_failed_total} failed, {self.num_reached_receiver_total} reached receiver")
-		logger.debug(f"Total times hit target node: {self.num_hit_target_node}")
+		logger.debug("Schedule executed: %s sent, %s failed, %s reached receiver", self.num_sent_total, self.num_failed_total, self.num_reached_receiver_total)
+		logger.debug("Total times hit target node: %s", self.num_hit_target_node)
 		return self.num_sent_total, self.num_failed_total, self.num_reached_receiver_total, self.num_hit_target_node
 
 	def create_payment(self, route, amount, processing_delay, desired_result):
@@ -175,27 +250,26 @@ class Simulator:
 			- desired_result
 				True for honest payments, False for jams.
 		'''
-		p, u_nodes, d_nodes = None, route[:-1], route[1:]
-		for u_node, d_node in reversed(list(zip(u_nodes, d_nodes))):
-			logger.debug(f"Wrapping payment for fee policy from {u_node} to {d_node}")
-			# Note: we model the sender's payment construction here
-			# The sender can't check if a hop really can forward (i.e., is not jammed)
-			# TODO: implement proper logic like: if the cheapest channel is jammed, choose another one
-			# also note: this check is time-independent: we can check capacity and enabled status without time
-			# only jamming status check is time-sensitive, but this is unavailable for us here
-			chosen_ch = self.ln_model.get_hop(u_node, d_node).get_cheapest_channel_maybe_can_forward(Direction(u_node, d_node), amount)
-			chosen_cid = chosen_ch.get_cid()
-			logger.debug(f"Suggested cheapest cid: {chosen_cid}")
-			hop = self.ln_model.get_hop(u_node, d_node)
-			#logger.debug(f"Hop of this cid: {hop}")
-			channel = hop.get_channel(chosen_cid)
-			#logger.debug(f"Channel of chosen cid {chosen_cid}: {channel}")
-			chosen_ch_in_dir = channel.in_direction(Direction(u_node, d_node))
+		# Note: we model the sender's payment construction here
+		# The sender can't check if a hop really can forward (i.e., is not jammed)
+		# TODO: implement proper logic like: if the cheapest channel is jammed, choose another one
+		# also note: this check is time-independent: we can check capacity and enabled status without time
+		# only jamming status check is time-sensitive, but this is unavailable for us here
+		# First, choose the cheapest channel direction for each hop in one forward pass.
+		chosen_ch_in_dirs = [None] * (len(route) - 1)
+		for i, (u_node, d_node) in enumerate(Router.get_hops(route)):
+			chosen_cid, chosen_ch_in_dirs[i] = self.ln_model.get_cheapest_channel_maybe_can_forward(u_node, d_node, amount)
+			logger.debug("Suggested cheapest cid from %s to %s: %s", u_node, d_node, chosen_cid)
+		# Then, wrap the payment starting from the last hop.
+		p = None
+		for i in reversed(range(len(chosen_ch_in_dirs))):
+			d_node = route[i + 1]
+			logger.debug("Wrapping payment for fee policy from %s to %s", route[i], d_node)
 			is_last_hop = p is None
 			p = Payment(
 				downstream_payment=p,
 				downstream_node=d_node,
-				channel_in_direction=chosen_ch_in_dir,
+				channel_in_direction=chosen_ch_in_dirs[i],
 				desired_result=desired_result if is_last_hop else None,
 				processing_delay=processing_delay if is_last_hop else None,
 				last_hop_body=amount if is_last_hop else None)
@@ -214,17 +288,34 @@ class JammingSimulator(Simulator):
 		target_node=None,
 		max_route_length=ProtocolParams["MAX_ROUTE_LENGTH"],
 		max_target_node_pairs_per_route=None,
-		jammer_must_route_via_nodes=[]):
+		jammer_must_route_via_nodes=[],
+		num_processes=1):
 		self.target_node_pairs = target_node_pairs
 		self.target_node = target_node
 		self.max_target_node_pairs_per_route = max_target_node_pairs_per_route if max_target_node_pairs_per_route is not None else max_route_length - 2
 		self.jammer_must_route_via_nodes = jammer_must_route_via_nodes
+		# the jammer's routes via must-route nodes don't change between batches, so we only construct them once
+		self.static_jam_routes = {}
 		# we may not finish jamming a hop due to roll-back of the last looped jam
 		# we can have at most as many unjammed slots as hops in the whole route
 		# if needed, we jam it separately with no-repeated-hops-allowed route
 		#max_default_routes_per_target_node_pair = 1 + ProtocolParams["MAX_ROUTE_LENGTH"]
 		#max_num_routes = len(self.target_node_pairs) * max_default_routes_per_target_node_pair if max_num_routes is None else max_num_routes
-		Simulator.__init__(self, ln_model, max_num_routes, max_num_attempts_per_route, max_route_length, num_runs_per_simulation)
+		Simulator.__init__(self, ln_model, max_num_routes, max_num_attempts_per_route, max_route_length, num_runs_per_simulation, num_processes)
+
+	def reset(self):
+		Simulator.reset(self)
+		# Jams are re-sent along the same routes in every batch.
+		# A payment doesn't change after construction, so we construct each jam payment once per run.
+		# (Fees may change between runs, so we don't keep jam payments across runs.)
+		self.jam_payments = {}
+
+	def get_jam_payment(self, route, event):
+		# Return the jam payment for the route and event parameters (constructed once per run).
+		key = (tuple(route), event.amount, event.processing_delay, event.desired_result)
+		if key not in self.jam_payments:
+			self.jam_payments[key] = self.create_payment(route, event.amount, event.processing_delay, event.desired_result)
+		return self.jam_payments[key]
 
 	def run_simulation_series_without_extrapolation(
 		self,
@@ -240,25 +331,14 @@ class JammingSimulator(Simulator):
 			This is technically correct but suboptimal, as all jams have the same value,
 			and we don't take advantage of this during route creation.
 		'''
-		simulation_series_results = []
-		if num_runs_per_simulation is None:
-			num_runs_per_simulation = self.num_runs_per_simulation
-		total_num_simulations, simulation_num = len(upfront_base_coeff_range) * len(upfront_rate_coeff_range), 0
-		for upfront_base_coeff in upfront_base_coeff_range:
-			for upfront_rate_coeff in upfront_rate_coeff_range:
-				simulation_num += 1
-				percent_done = round(100 * simulation_num / total_num_simulations)
-				logger.debug(f"Starting simulation {simulation_num} / {total_num_simulations} ({percent_done} % done) with coeffs: base {upfront_base_coeff}, rate {upfront_rate_coeff}")
-				self.ln_model.set_upfront_fee_from_coeff_for_all(upfront_base_coeff, upfront_rate_coeff)
-				stats, revenues = self.run_simulation(schedule_generation_function, duration, num_runs_per_simulation, normalize_results_for_duration)
-				result = {
-					"upfront_base_coeff": upfront_base_coeff,
-					"upfront_rate_coeff": upfront_rate_coeff,
-					"stats": stats,
-					"revenues": revenues
-				}
-				simulation_series_results.append(result)
-		return simulation_series_results
+		return Simulator.run_simulation_series(
+			self,
+			schedule_generation_function,
+			duration,
+			upfront_base_coeff_range,
+			upfront_rate_coeff_range,
+			num_runs_per_simulation,
+			normalize_results_for_duration)
 
 	def run_simulation_series_with_extrapolation(
 		self,
@@ -284,11 +364,11 @@ class JammingSimulator(Simulator):
 		# we run the simulation just once, and scale the resulting revenue w.r.t base fees
 		some_base_coeff = non_zero_upfront_base_coeff[0] if non_zero_upfront_base_coeff else 0
 		some_rate_coeff = non_zero_upfront_rate_coeff[0] if non_zero_upfront_rate_coeff else 0
-		logger.debug(f"Running one jamming simulation for extrapolation with upfront base / rate coeffs: {some_base_coeff}, {some_rate_coeff}")
+		logger.debug("Running one jamming simulation for extrapolation with upfront base / rate coeffs: %s, %s", some_base_coeff, some_rate_coeff)
 		self.ln_model.set_upfront_fee_from_coeff_for_all(
 			upfront_base_coeff=some_base_coeff, upfront_rate_coeff=some_rate_coeff)
 		stats_some_coeff, revenues_some_coeff = self.run_simulation(schedule_generation_function, duration, num_runs_per_simulation, normalize_results_for_duration)
-		logger.debug(f"Revenues for coeffs {some_base_coeff}, {some_rate_coeff}: {revenues_some_coeff}")
+		logger.debug("Revenues for coeffs %s, %s: %s", some_base_coeff, some_rate_coeff, revenues_some_coeff)
 		# This is how much revenue each node gets when it forwards one jam.
 		# We then scale it w.r.t. various upfront fee coefficients.
 		# Note: success-fee is zero for all jams, so we don't have to account for it!
@@ -304,10 +384,9 @@ class JammingSimulator(Simulator):
 		one_hit_upfront_fee_some_coeffs = one_hit_upfront_fee(base=some_base_coeff, rate=some_rate_coeff)
 		for upfront_base_coeff in upfront_base_coeff_range:
 			for upfront_rate_coeff in upfront_rate_coeff_range:
-				revenues = deepcopy(revenues_some_coeff)
 				one_hit_upfront_fee_these_coeffs = one_hit_upfront_fee(base=upfront_base_coeff, rate=upfront_rate_coeff)
 				revenue_scale = one_hit_upfront_fee_these_coeffs / one_hit_upfront_fee_some_coeffs
-				revenues.update({node: revenues[node] * revenue_scale for node in revenues})
+				revenues = {node: revenue * revenue_scale for node, revenue in revenues_some_coeff.items()}
 				result = {
 					"upfront_base_coeff": upfront_base_coeff,
 					"upfront_rate_coeff": upfront_rate_coeff,
@@ -340,29 +419,35 @@ class JammingSimulator(Simulator):
 		return simulation_series_results
 
 	def handle_event(self, event):
-		logger.debug(f"Launching jam batch at time {self.now}")
+		logger.debug("Launching jam batch at time %s", self.now)
 		if self.jammer_must_route_via_nodes:
 			self.send_jam_with_static_route(event)
 		else:
 			self.send_jam_with_router(event)
 		next_batch_time = self.now + event.processing_delay
 		if next_batch_time > self.schedule.end_time:
-			logger.debug(f"Schedule time exceeded")
+			logger.debug("Schedule time exceeded")
 		else:
-			logger.debug(f"Moving to the next jam batch")
-			logger.debug(f"Pushing jam {event} into schedule for time {next_batch_time}")
+			logger.debug("Moving to the next jam batch")
+			logger.debug("Pushing jam %s into schedule for time %s", event, next_batch_time)
 			self.schedule.put_event(next_batch_time, event)
 
+	def get_static_jam_route(self):
+		# Return the jammer's route via the must-route nodes (constructed once per list of nodes).
+		must_nodes = tuple(self.jammer_must_route_via_nodes)
+		if must_nodes not in self.static_jam_routes:
+			rg = self.ln_model.routing_graph
+			assert(rg.has_edge("JammerSender", must_nodes[0]))
+			assert(all(rg.has_edge(hop[0], hop[1]) for hop in zip(must_nodes, must_nodes[1:])))
+			assert(rg.has_edge(must_nodes[-1], "JammerReceiver"))
+			#route_from_sender = nx.shortest_path(rg, "JammerSender", must_nodes[0])
+			#route_to_receiver = nx.shortest_path(rg, must_nodes[-1], "JammerReceiver")
+			# FIXME: ensure that routes fit for jams here?
+			self.static_jam_routes[must_nodes] = ["JammerSender"] + list(must_nodes) + ["JammerReceiver"]
+		return self.static_jam_routes[must_nodes]
+
 	def send_jam_with_static_route(self, event):
-		rg = self.ln_model.routing_graph
-		must_nodes = self.jammer_must_route_via_nodes
-		assert(rg.has_edge("JammerSender", must_nodes[0]))
-		assert(all(rg.has_edge(hop[0], hop[1]) for hop in zip(must_nodes, must_nodes[1:])))
-		assert(rg.has_edge(must_nodes[-1], "JammerReceiver"))
-		#route_from_sender = nx.shortest_path(rg, "JammerSender", must_nodes[0])
-		#route_to_receiver = nx.shortest_path(rg, must_nodes[-1], "JammerReceiver")
-		# FIXME: ensure that routes fit for jams here?
-		route = ["JammerSender"] + must_nodes + ["JammerReceiver"]
+		route = self.get_static_jam_route()
 		num_sent, num_failed, num_reached_receiver, last_node_reached, first_node_not_reached, num_hit_target_node = self.send_jam_via_route(event, route)
 		assert(first_node_not_reached is not None)
 		jammed_hop = (last_node_reached, first_node_not_reached)
@@ -370,42 +455,54 @@ class JammingSimulator(Simulator):
 		self.num_failed_total += num_failed
 		self.num_reached_receiver_total += num_reached_receiver
 		self.num_hit_target_node += num_hit_target_node
-		self.nodes_hit.update(route)
-		logger.debug(f"Jammed hop {jammed_hop}")
+		logger.debug("Jammed hop %s", jammed_hop)
 
 	def all_target_node_pairs_are_really_jammed(self):
 		# Query the _real_ jammed status from the hop graph (used for debugging).
 		# The jammer can't (shouldn't) see this, it can only look at error types returned.
-		return all(self.ln_model.get_hop(*hop).cannot_forward(Direction(*hop), self.now) for hop in self.target_node_pairs)
+		return not self.get_node_pairs_really_unjammed(self.target_node_pairs)
+
+	def get_node_pairs_really_unjammed(self, node_pairs):
+		# Return the set of the given node pairs that can still forward at the current time (see above).
+		return {hop for hop in node_pairs if self.ln_model.can_forward(*hop, self.now)}
 
 	def get_jammed_status_of_hops(self, hops):
+		# The jammed status is read via the channel direction index (see LNModel.can_forward),
+		# only the slot count needs the hop itself.
 		return [(
 			Router.shorten_ids(hop),
-			self.ln_model.get_hop(*hop).cannot_forward(Direction(*hop), self.now),
+			not self.ln_model.can_forward(*hop, self.now),
 			self.ln_model.get_hop(*hop).get_total_num_slots_occupied_in_direction(Direction.Alph)
 		) for hop in hops]
 
 	def send_jam_with_router(self, event):
 		#max_num_routes = self.max_num_routes
-		target_node_pairs_unjammed = self.target_node_pairs.copy()
+		# We keep unjammed target node pairs in a dict used as an ordered set:
+		# membership checks and removals are O(1), and the router still gets the pairs in their original order
+		# (the order of target node pairs determines the order in which routes are generated).
+		target_node_pairs_unjammed = dict.fromkeys(self.target_node_pairs)
+		target_node_pairs = set(self.target_node_pairs)
 		router = Router(self.ln_model, event.amount, event.sender, event.receiver, self.max_target_node_pairs_per_route, self.max_route_length)
-		router.update_route_generator(target_node_pairs_unjammed)
+		router.update_route_generator(list(target_node_pairs_unjammed))
 		num_route = 0
-		while not self.all_target_node_pairs_are_really_jammed():
+		# A jammed hop stays jammed until the time moves forward: its earliest HTLC resolves later than now.
+		# Hence, within a batch we only re-check the target node pairs that were unjammed at the previous check.
+		target_node_pairs_really_unjammed = self.get_node_pairs_really_unjammed(self.target_node_pairs)
+		while target_node_pairs_really_unjammed:
 			num_route += 1
-			logger.debug(f"Trying jamming route {num_route + 1} of max {self.max_num_routes}")
-			logger.debug(f"At least {len(target_node_pairs_unjammed)} / {len(self.target_node_pairs)} target node pairs still unjammed")
-			#logger.info(f"Trying to include up to {self.max_target_node_pairs_per_route} target node pairs in route of length {self.max_route_length}")
+			logger.debug("Trying jamming route %s of max %s", num_route + 1, self.max_num_routes)
+			logger.debug("At least %s / %s target node pairs still unjammed", len(target_node_pairs_unjammed), len(self.target_node_pairs))
+			if TRACE:
+				logger.debug("Trying to include up to %s target node pairs in route of length %s", self.max_target_node_pairs_per_route, self.max_route_length)
 			if not target_node_pairs_unjammed:
-				logger.debug(f"No unjammed target node pairs left, no need to try further routes")
+				logger.debug("No unjammed target node pairs left, no need to try further routes")
 				break
 			try:
 				route = router.get_route()
-				logger.debug(f"Suggested route of length {len(route)}")
+				logger.debug("Suggested route of length %s", len(route))
 			except StopIteration:
-				logger.warning(f"No route from {event.sender} to {event.receiver} via any of {target_node_pairs_unjammed}")
+				logger.warning(f"No route from {event.sender} to {event.receiver} via any of {list(target_node_pairs_unjammed)}")
 				break
-			#logger.debug(f"Found route of length {len(route)}")
 			num_sent, num_failed, num_reached_receiver, last_node_reached, first_node_not_reached, num_hit_target_node = self.send_jam_via_route(event, route)
 			self.num_sent_total += num_sent
 			self.num_failed_total += num_failed
@@ -413,50 +510,53 @@ class JammingSimulator(Simulator):
 			self.num_hit_target_node += num_hit_target_node
 			if first_node_not_reached is not None:
 				jammed_hop = (last_node_reached, first_node_not_reached)
-				logger.debug(f"Jammed hop {jammed_hop}")
+				logger.debug("Jammed hop %s", jammed_hop)
 				if "JammerSender" in jammed_hop or "JammerReceiver" in jammed_hop:
 					logger.warning(f"Jammer's node is in a jammed hop {jammed_hop}. Assign more slots to the jammer!")
-				assert(jammed_hop in target_node_pairs_unjammed or jammed_hop not in self.target_node_pairs)
+				assert(jammed_hop in target_node_pairs_unjammed or jammed_hop not in target_node_pairs)
 				# Only if the newly jammed hop occurs in the route exactly once, can we be sure it's really jammed!
 				# Otherwise, if the hop became jammed on a non-first occurrence in the route,
 				# some slots would be freed up when the jam rolls back.
 				# In that case, we don't exclude the hop from the list of unjammed hop, and move on to the next route.
 				# The hop will be eventually jammed via some future (presumably non-looped) route.
-				if Router.num_hop_occurs_in_path(jammed_hop, route) == 1:
-					logger.debug(f"Removing {jammed_hop} from router (occurs only once in path)")
+				num_occurs = Router.num_hop_occurs_in_path(jammed_hop, route)
+				if num_occurs == 1:
+					logger.debug("Removing %s from router (occurs only once in path)", jammed_hop)
 					router.remove_hop(jammed_hop)
 					if jammed_hop in target_node_pairs_unjammed:
-						logger.debug(f"Removing {jammed_hop} from unjammed hops {target_node_pairs_unjammed}")
-						target_node_pairs_unjammed.remove(jammed_hop)
-						router.update_route_generator(target_node_pairs_unjammed)
+						logger.debug("Removing %s from unjammed hops %s", jammed_hop, list(target_node_pairs_unjammed))
+						del target_node_pairs_unjammed[jammed_hop]
+						router.update_route_generator(list(target_node_pairs_unjammed))
 				else:
-					logger.debug(f"Hop {jammed_hop} may not be fully jammed!")
-					logger.debug(f"Jammed hop {jammed_hop} occurs {Router.num_hop_occurs_in_path(jammed_hop, route)} times in route {route}")
+					logger.debug("Hop %s may not be fully jammed!", jammed_hop)
+					logger.debug("Jammed hop %s occurs %s times in route %s", jammed_hop, num_occurs, route)
 			else:
-				logger.debug(f"All jams reached receiver for route {route}")
-				#logger.debug(f"Allow for more attempts per route (now at {self.max_num_attempts_per_route})!")
-				target_node_pairs_unjammed_in_this_route = [hop for hop in Router.get_hops(route) if (
-					hop in self.target_node_pairs
-					and self.ln_model.get_hop(*hop).can_forward(Direction(*hop), self.now)
-				)]
-				logger.debug(f"Target hops unjammed in this route: {self.get_jammed_status_of_hops(target_node_pairs_unjammed_in_this_route)}")
-			logger.debug(f"All target node pairs jammed status: {self.get_jammed_status_of_hops(self.target_node_pairs)}")
-		if not self.all_target_node_pairs_are_really_jammed():
-			target_node_pairs_left_unjammed = [hop for hop in self.target_node_pairs if (
-				self.ln_model.get_hop(*hop).can_forward(Direction(*hop), self.now)
-			)]
+				logger.debug("All jams reached receiver for route %s", route)
+				if TRACE:
+					logger.debug("Allow for more attempts per route (now at %s)!", self.max_num_attempts_per_route)
+				if logger.isEnabledFor(logging.DEBUG):
+					target_node_pairs_unjammed_in_this_route = [hop for hop in Router.get_hops(route) if (
+						hop in target_node_pairs
+						and self.ln_model.can_forward(*hop, self.now)
+					)]
+					logger.debug("Target hops unjammed in this route: %s", self.get_jammed_status_of_hops(target_node_pairs_unjammed_in_this_route))
+			if logger.isEnabledFor(logging.DEBUG):
+				logger.debug("All target node pairs jammed status: %s", self.get_jammed_status_of_hops(self.target_node_pairs))
+			target_node_pairs_really_unjammed = self.get_node_pairs_really_unjammed(target_node_pairs_really_unjammed)
+		if target_node_pairs_really_unjammed:
+			target_node_pairs_left_unjammed = [hop for hop in self.target_node_pairs if hop in target_node_pairs_really_unjammed]
 			# sic! num_routes, not (num_routes + 1): though we start at zero, we count the last interation which breaks before producing a route
 			logger.warning(f"Couldn't jam {len(target_node_pairs_left_unjammed)} target node pairs after {num_route} routes at time {self.now}.")
 			logger.warning(f"Unjammed target node pairs: {self.get_jammed_status_of_hops(target_node_pairs_left_unjammed)}")
 			#exit()
 		else:
-			logger.debug(f"All target node pairs are jammed at time {self.now}")
+			logger.debug("All target node pairs are jammed at time %s", self.now)
 
 	def send_jam_via_route(self, event, route):
 		assert(event.desired_result is False)
-		logger.debug(f"Sending jam via {route}")
-		logger.debug(f"Receiver will get {event.amount} in payment body")
-		p = self.create_payment(route, event.amount, event.processing_delay, event.desired_result)
+		logger.debug("Sending jam via %s", route)
+		logger.debug("Receiver will get %s in payment body", event.amount)
+		p = self.get_jam_payment(route, event)
 		num_sent, num_failed, num_reached_receiver, num_hit_target_node = 0, 0, 0, 0
 		for attempt_num in range(self.max_num_attempts_per_route):
 			reached_receiver, last_node_reached, first_node_not_reached, error_type, nodes_hit_count = self.ln_model.attempt_send_payment(
@@ -464,23 +564,23 @@ class JammingSimulator(Simulator):
 				event.sender,
 				self.now,
 				attempt_num)
+			# jams always fail: either deliberately at the receiver, or somewhere along the route
 			assert(error_type is not None)
 			num_sent += 1
+			num_failed += 1
 			num_hit_target_node += nodes_hit_count[self.target_node] if self.target_node is not None else 0
-			if error_type is not None:
-				num_failed += 1
 			assert(reached_receiver == (first_node_not_reached is None))
 			if reached_receiver:
-				logger.debug(f"Jam reached receiver {last_node_reached} at attempt {attempt_num}")
+				logger.debug("Jam reached receiver %s at attempt %s", last_node_reached, attempt_num)
 				num_reached_receiver += 1
 			else:
-				logger.debug(f"Jam failed at {last_node_reached}-{first_node_not_reached} with {error_type} at attempt {attempt_num}")
-				if error_type in (ErrorType.LOW_BALANCE, ErrorType.FAILED_DELIBERATELY):
-					logger.debug(f"Continue the batch at time {self.now}")
-				elif error_type == ErrorType.NO_SLOTS:
-					logger.debug(f"Route {route} jammed at time {self.now}")
+				logger.debug("Jam failed at %s-%s with %s at attempt %s", last_node_reached, first_node_not_reached, error_type, attempt_num)
+				# enum members are singletons, so we compare by identity
+				if error_type is ErrorType.NO_SLOTS:
+					logger.debug("Route %s jammed at time %s", route, self.now)
 					break
-		self.nodes_hit.update(route)
+				elif error_type is ErrorType.LOW_BALANCE or error_type is ErrorType.FAILED_DELIBERATELY:
+					logger.debug("Continue the batch at time %s", self.now)
 		return num_sent, num_failed, num_reached_receiver, last_node_reached, first_node_not_reached, num_hit_target_node
 
 
@@ -493,9 +593,10 @@ class HonestSimulator(Simulator):
 		max_num_attempts_per_route,
 		num_runs_per_simulation,
 		max_route_length=ProtocolParams["MAX_ROUTE_LENGTH"],
-		subtract_last_hop_upfront_fee_for_honest_payments=True):
+		subtract_last_hop_upfront_fee_for_honest_payments=True,
+		num_processes=1):
 		self.subtract_last_hop_upfront_fee_for_honest_payments = subtract_last_hop_upfront_fee_for_honest_payments
-		Simulator.__init__(self, ln_model, max_num_routes, max_num_attempts_per_route, max_route_length, num_runs_per_simulation)
+		Simulator.__init__(self, ln_model, max_num_routes, max_num_attempts_per_route, max_route_length, num_runs_per_simulation, num_processes)
 
 	def handle_event(self, event):
 		return self.send_honest_payment(event)
@@ -505,9 +606,9 @@ class HonestSimulator(Simulator):
 			must_nodes = [event.sender] + event.must_route_via_nodes + [event.receiver]
 			route = self.get_shortest_route_via_nodes(must_nodes, event.amount)
 			if route is None:
-				logger.debug(f"Couldn't handle honest payment {event}, moving on")
+				logger.debug("Couldn't handle honest payment %s, moving on", event)
 			else:
-				logger.debug(f"Constructed route from {event.sender} to {event.receiver} via given nodes {event.must_route_via_nodes}: {route}")
+				logger.debug("Constructed route from %s to %s via given nodes %s: %s", event.sender, event.receiver, event.must_route_via_nodes, route)
 				num_sent, num_failed, num_reached_receiver = self.send_honest_payment_via_route(event, route)
 				self.num_sent_total += num_sent
 				self.num_failed_total += num_failed
@@ -515,42 +616,32 @@ class HonestSimulator(Simulator):
 		else:
 			routes = self.ln_model.get_shortest_routes(event.sender, event.receiver, event.amount)
 			for num_route in range(self.max_num_routes):
-				try:
-					route = next(routes)
-					logger.debug(f"Found route: {route}")
-				except StopIteration:
+				route = next(routes, None)
+				if route is None:
 					logger.debug("No route, skipping event")
 					break
+				logger.debug("Found route: %s", route)
 				num_sent, num_failed, num_reached_receiver = self.send_honest_payment_via_route(event, route)
 				self.num_sent_total += num_sent
 				self.num_failed_total += num_failed
 				self.num_reached_receiver_total += num_reached_receiver
 				if num_reached_receiver > 0:
-					logger.debug(f"Honest payment reached receiver at route {num_route + 1}, no need to try further routes")
+					logger.debug("Honest payment reached receiver at route %s, no need to try further routes", num_route + 1)
 					break
 
 	def get_shortest_route_via_nodes(self, nodes, amount):
 		route = [nodes[0]]
-		logger.debug(f"Constructing route via {nodes} for {amount}")
+		logger.debug("Constructing route via %s for %s", nodes, amount)
 		for (u_node, d_node) in Router.get_hops(nodes):
-			logger.debug(f"Constructing sub-route {u_node}-{d_node}")
-			sub_routes = self.ln_model.get_shortest_routes(u_node, d_node, amount)
-			if sub_routes is None:
-				logger.debug(f"No route from {u_node} to {d_node} for amount {amount}")
+			logger.debug("Constructing sub-route %s-%s", u_node, d_node)
+			sub_route = next(self.ln_model.get_shortest_routes(u_node, d_node, amount), None)
+			if sub_route is None:
+				logger.debug("Sub-route from %s to %s for amount %s is None", u_node, d_node, amount)
 				return None
-			else:
-				try:
-					sub_route = next(sub_routes)
-					logger.debug(f"Sub-route is: {sub_route}")
-				except StopIteration:
-					logger.debug(f"Sub-route from {u_node} to {d_node} for amount {amount} is None")
-					return None
-				if sub_route is None:
-					return None
-				else:
-					route.extend(sub_route[1:])
-					logger.debug(f"Route now is: {route}")
-		logger.debug(f"Final route is: {route}")
+			logger.debug("Sub-route is: %s", sub_route)
+			route.extend(sub_route[1:])
+			logger.debug("Route now is: %s", route)
+		logger.debug("Final route is: %s", route)
 		return route
 
 	def send_honest_payment_via_route(self, event, route):
@@ -559,7 +650,7 @@ class HonestSimulator(Simulator):
 			last_hop_body = self.adjust_body_for_route(route, event.amount)
 		else:
 			last_hop_body = event.amount
-		logger.debug(f"Receiver will get {last_hop_body} in payment body")
+		logger.debug("Receiver will get %s in payment body", last_hop_body)
 		p = self.create_payment(route, last_hop_body, event.processing_delay, event.desired_result)
 		num_sent, num_failed, num_reached_receiver = 0, 0, 0
 		for attempt_num in range(self.max_num_attempts_per_route):
@@ -570,13 +661,12 @@ class HonestSimulator(Simulator):
 				attempt_num)
 			num_sent += 1
 			if reached_receiver:
-				logger.debug(f"Payment reached the receiver after {attempt_num + 1} attempts")
+				logger.debug("Payment reached the receiver after %s attempts", attempt_num + 1)
 				num_reached_receiver += 1
 				break
 			elif error_type is not None:
-				logger.debug(f"Payment failed at {last_node_reached}-{first_node_not_reached} with {error_type} at attempt {attempt_num}")
+				logger.debug("Payment failed at %s-%s with %s at attempt %s", last_node_reached, first_node_not_reached, error_type, attempt_num)
 				num_failed += 1
-		self.nodes_hit.update(route)
 		return num_sent, num_failed, num_reached_receiver
 
 	@staticmethod
@@ -584,34 +674,57 @@ class HonestSimulator(Simulator):
 		'''
 			Given target_amount and fee function, find amount such that:
 			amount + fee(amount) ~ target_amount
+			Fee functions of channel directions are affine, and we invert them directly.
+			Other fee functions are inverted by bisection.
 		'''
 		assert(precision >= 1)
+		fee_coefficients = ChannelInDirection.get_fee_coefficients(upfront_fee_function)
+		if fee_coefficients is not None:
+			return HonestSimulator.body_for_amount_affine(target_amount, *fee_coefficients)
 		min_body, max_body, num_step = 0, target_amount, 0
+		converged = False
 		while num_step < max_steps:
 			body = round((min_body + max_body) / 2)
-			fee = upfront_fee_function(body)
-			amount = body + fee
-			if abs(target_amount - amount) < precision:
+			amount = body + upfront_fee_function(body)
+			if -precision < target_amount - amount < precision:
 				break
+			# if the bounds don't change, further steps would evaluate the same body again
 			if amount < target_amount:
+				converged = body == min_body
 				min_body = body
 			else:
+				converged = body == max_body
 				max_body = body
+			if converged:
+				break
 			num_step += 1
-		if abs(target_amount - amount) >= precision:
-			logger.debug(f"Couldn't reach precision {precision} in body for amount {target_amount}!")
-			logger.debug(f"Made {num_step} of {max_steps} allowed.")
-			assert(num_step == max_steps)
+		if not -precision < target_amount - amount < precision:
+			logger.debug("Couldn't reach precision %s in body for amount %s!", precision, target_amount)
+			logger.debug("Made %s of %s allowed.", num_step, max_steps)
+			assert(converged or num_step == max_steps)
+		return body
+
+	@staticmethod
+	def body_for_amount_affine(target_amount, upfront_base_fee, upfront_fee_rate):
+		'''
+			Given target_amount and affine upfront fee coefficients, find the largest integer amount such that:
+			amount + upfront_base_fee + upfront_fee_rate * amount <= target_amount
+			This is the closed-form equivalent of body_for_amount for the generic fee function.
+		'''
+		def amount_for_body(body):
+			return body + ChannelInDirection.generic_fee_function(upfront_base_fee, upfront_fee_rate, body)
+		body = floor((target_amount - upfront_base_fee) / (1 + upfront_fee_rate))
+		# correct for floating-point rounding in the division
+		if amount_for_body(body) > target_amount:
+			body -= 1
+		elif amount_for_body(body + 1) <= target_amount:
+			body += 1
 		return body
 
 	def adjust_body_for_route(self, route, amount):
 		assert len(route) >= 2
 		pre_receiver, receiver = route[-2], route[-1]
-		logger.debug(f"Adjusting payment body for the last hop {pre_receiver}-{receiver}")
-		chosen_ch = self.ln_model.get_hop(pre_receiver, receiver).get_cheapest_channel_maybe_can_forward(
-			Direction(pre_receiver, receiver),
-			amount)
-		chosen_cid = chosen_ch.get_cid()
-		logger.debug(f"Chosen cheapest channel for payment body adjustment: {chosen_cid}")
-		chosen_ch_in_dir = chosen_ch.in_direction(Direction(pre_receiver, receiver))
+		logger.debug("Adjusting payment body for the last hop %s-%s", pre_receiver, receiver)
+		chosen_cid, chosen_ch_in_dir = self.ln_model.get_cheapest_channel_maybe_can_forward(pre_receiver, receiver, amount)
+		logger.debug("Chosen cheapest channel for payment body adjustment: %s", chosen_cid)
 		return HonestSimulator.body_for_amount(amount, chosen_ch_in_dir.upfront_fee_function)
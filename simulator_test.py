@@ -1,11 +1,13 @@
 from math import isclose, floor
 import json
+import multiprocessing
 
 from direction import Direction
 from simulator import JammingSimulator, HonestSimulator
 from event import Event
 from schedule import GenericSchedule, HonestSchedule
 from lnmodel import LNModel
+from channelindirection import ChannelInDirection
 from enumtypes import FeeType, ErrorType
 
 import logging
@@ -168,6 +170,22 @@ def test_simulator_one_jam_batch():
 	assert(a_rev_success == b_rev_success == c_rev_success == d_rev_success == 0)
 
 
+def test_jam_payment_reused_within_run():
+	sim = get_example_j_sim()
+	sch = GenericSchedule(duration=1)
+	event = Event("Alice", "Dave", 100, 7, False)
+	sch.put_event(0, event)
+	sim.execute_schedule(sch)
+	route = ["Alice", "Mary", "Charlie", "Dave"]
+	p = sim.get_jam_payment(route, event)
+	assert(sim.get_jam_payment(tuple(route), event) is p)
+	assert(len(sim.jam_payments) == 1)
+	# jam payments are constructed afresh in each run
+	sim.reset()
+	assert(not sim.jam_payments)
+	assert(sim.get_jam_payment(route, event) is not p)
+
+
 def test_simulator_end_htlc_resolution():
 	sim = HonestSimulator(
 		get_example_ln_model(),
@@ -223,6 +241,59 @@ def test_simulator_with_random_schedule():
 	#example_simulator.ln_model.report_revenues()
 
 
+def test_run_simulation_in_parallel():
+	sim = get_example_h_sim()
+	sim.num_processes = 2
+	num_runs = 4
+	stats, revenues = sim.run_simulation(
+		lambda duration: HonestSchedule(
+			duration=duration,
+			senders=["Alice"],
+			receivers=["Dave"]),
+		duration=60,
+		num_runs_per_simulation=num_runs)
+	assert(stats["num_sent"] > 0)
+	assert(set(revenues) == set(sim.ln_model.hop_graph.nodes))
+	# fees only move between nodes
+	assert(isclose(sum(revenues.values()), 0, abs_tol=1e-6))
+	assert(revenues["Alice"] < 0)
+
+
+def test_run_simulation_series_in_parallel():
+	sim = get_example_h_sim()
+	sim.num_processes = 2
+	upfront_base_coeff_range, upfront_rate_coeff_range = [0, 0.5], [0, 0.1]
+	results = sim.run_simulation_series(
+		lambda duration: HonestSchedule(
+			duration=duration,
+			senders=["Alice"],
+			receivers=["Dave"]),
+		duration=10,
+		upfront_base_coeff_range=upfront_base_coeff_range,
+		upfront_rate_coeff_range=upfront_rate_coeff_range)
+	# results are returned in the order of the coefficient grid
+	assert([(r["upfront_base_coeff"], r["upfront_rate_coeff"]) for r in results] == [
+		(base, rate) for base in upfront_base_coeff_range for rate in upfront_rate_coeff_range])
+	for result in results:
+		assert(isclose(sum(result["revenues"].values()), 0, abs_tol=1e-6))
+
+
+def test_run_simulation_without_fork(monkeypatch):
+	# without fork (e.g., on Windows), runs fall back to the main process
+	monkeypatch.setattr(multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+	sim = get_example_h_sim()
+	sim.num_processes = 2
+	assert(not sim.can_use_worker_processes(num_tasks=4))
+	stats, revenues = sim.run_simulation(
+		lambda duration: HonestSchedule(
+			duration=duration,
+			senders=["Alice"],
+			receivers=["Dave"]),
+		duration=10,
+		num_runs_per_simulation=2)
+	assert(isclose(sum(revenues.values()), 0, abs_tol=1e-6))
+
+
 def test_simulator_jamming():
 	# FIXME: set jammer's channels properly
 	sim = JammingSimulator(
@@ -311,6 +382,33 @@ def test_body_for_amount_function():
 		max_steps=3)
 	assert(adjusted_amount == 875)
 
+	# a fee function that makes the target unreachable within precision:
+	# we stop as soon as the bisection can't make progress
+	bodies_tried = []
+
+	def step_fee_function(a):
+		bodies_tried.append(a)
+		return 10 if a > 500 else 0
+	adjusted_amount = HonestSimulator.body_for_amount(505, step_fee_function)
+	assert(adjusted_amount == 500)
+	assert(len(bodies_tried) < 50)
+
+
+def test_body_for_amount_affine():
+	target_amount = 1000
+	base, rate = 5, 0.01
+	adjusted_amount = HonestSimulator.body_for_amount_affine(target_amount, base, rate)
+	# 985 * 0.01 + 5 = 9.85 + 5 = 14.85
+	# 985 + 14.85 = 999.85
+	assert(adjusted_amount == 985)
+	assert(adjusted_amount + base + rate * adjusted_amount <= target_amount)
+	assert(adjusted_amount + 1 + base + rate * (adjusted_amount + 1) > target_amount)
+	# with zero upfront fee, the body is the whole amount
+	assert(HonestSimulator.body_for_amount_affine(target_amount, 0, 0) == target_amount)
+	# fee functions of channel directions are inverted in closed form
+	ch_in_dir = ChannelInDirection(num_slots=1, upfront_base_fee=base, upfront_fee_rate=rate)
+	assert(HonestSimulator.body_for_amount(target_amount, ch_in_dir.upfront_fee_function) == 985)
+
 
 def test_error_response_honest():
 	sim = HonestSimulator(
@@ -1,5 +1,5 @@
 from string import hexdigits
-from random import choice
+from random import randrange
 
 
 import logging
@@ -7,4 +7,11 @@ logger = logging.getLogger(__name__)
 
 
 def generate_id(length=6):
-	return "".join(choice(hexdigits) for i in range(length))
+	# Draw all digits at once (one call to the random generator instead of one per digit),
+	# then spell the number out in the hexdigits alphabet (22 symbols, both cases).
+	n = randrange(len(hexdigits) ** length)
+	digits = []
+	for _ in range(length):
+		n, i = divmod(n, len(hexdigits))
+		digits.append(hexdigits[i])
+	return "".join(digits)